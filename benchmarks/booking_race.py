@@ -0,0 +1,69 @@
+"""
+Concurrency check of booking creation: fires parallel bookings of the same room
+and nights at a running app and checks that exactly one of them succeeds.
+tests/test_booking_race.py runs the same check in-process against the test database.
+
+Usage (app running on localhost:8000 with at least one room in the database):
+    python -m benchmarks.booking_race --requests 300 --room-id 1
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+
+import httpx
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def login(client: httpx.AsyncClient) -> None:
+    """ Register a throwaway user and store its access token cookie in the client """
+    credentials = {"email": f"race-{uuid.uuid4().hex[:8]}@example.com", "password": "password123"}
+    await client.post("/auth/register", json=credentials)
+    response = await client.post("/auth/login", json=credentials)
+    response.raise_for_status()
+    client.cookies.set("access_token", response.json()["data"]["access_token"])
+
+
+async def book(client: httpx.AsyncClient, payload: dict) -> tuple[int, float]:
+    started = time.perf_counter()
+    response = await client.post("/bookings/", json=payload)
+    return response.status_code, (time.perf_counter() - started) * 1000
+
+
+async def main(base_url: str, requests: int, room_id: int, days_ahead: int):
+    # Random far future nights, so repeated runs don't collide with each other
+    check_in = date.today() + timedelta(days=days_ahead + uuid.uuid4().int % 3650)
+    payload = {"room_id": room_id, "check_in": str(check_in), "check_out": str(check_in + timedelta(days=2))}
+
+    limits = httpx.Limits(max_connections=requests)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await login(client)
+        results = await asyncio.gather(*(book(client, payload) for _ in range(requests)))
+
+    statuses = Counter(code for code, _ in results)
+    latencies = [elapsed for _, elapsed in results]
+    print(f"Statuses: {dict(statuses)}")
+    print(
+        f"Latency ms: p50={statistics.median(latencies):.1f} "
+        f"p95={percentile(latencies, 95):.1f} p99={percentile(latencies, 99):.1f} max={max(latencies):.1f}"
+    )
+    assert statuses[201] == 1, f"expected exactly one booking, got {statuses[201]}"
+    assert statuses[201] + statuses[409] == requests, "unexpected response statuses"
+    print("OK: exactly one booking created")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel booking race check")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--room-id", type=int, default=1)
+    parser.add_argument("--days-ahead", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.requests, args.room_id, args.days_ahead))
@@ -0,0 +1,91 @@
+"""
+Benchmark of hotel title/location search with and without trigram indexes.
+
+Seeds a scratch copy of the hotels table with generated rows, prints
+EXPLAIN ANALYZE of the substring and similarity searches before and after
+creating GIN trigram indexes, then drops the scratch table.
+
+Usage:
+    python -m benchmarks.hotel_search_plan --rows 1000000 --term "ocea"
+"""
+import argparse
+import asyncio
+import time
+
+import asyncpg
+
+from src.config import settings
+
+WORDS_1 = ["Ocean", "Mountain", "City", "Desert", "Lakeside", "Historic", "Tropical", "Business", "Country", "Royal"]
+WORDS_2 = ["View", "Retreat", "Center", "Oasis", "Lodge", "Castle", "Paradise", "Hub", "Escape", "Palace"]
+WORDS_3 = ["Hotel", "Inn", "Resort", "Suites", "Hostel", "Spa"]
+LOCATIONS = ["Miami Beach", "Aspen", "New York", "Palm Springs", "Lake Tahoe", "Scotland", "Hawaii", "San Francisco", "Napa Valley", "Bali"]
+
+SEARCH_QUERIES = {
+    "ilike": "SELECT id FROM bench_hotels WHERE title ILIKE '%' || $1 || '%' ORDER BY id LIMIT 20",
+    "relevance": (
+        "SELECT id, similarity(title, $1) AS relevance FROM bench_hotels "
+        "WHERE title % $1 OR title ILIKE '%' || $1 || '%' ORDER BY relevance DESC, id LIMIT 20"
+    ),
+}
+
+
+def dsn() -> str:
+    return f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+
+
+async def seed(conn: asyncpg.Connection, rows: int):
+    """ Create scratch table and fill it with generated hotels """
+    await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    await conn.execute("DROP TABLE IF EXISTS bench_hotels")
+    await conn.execute("CREATE UNLOGGED TABLE bench_hotels (LIKE hotels INCLUDING DEFAULTS)")
+    await conn.execute(
+        """
+        INSERT INTO bench_hotels (id, title, stars, location)
+        SELECT
+            n,
+            ($1::text[])[1 + (random() * 9)::int] || ' ' || ($2::text[])[1 + (random() * 9)::int]
+                || ' ' || ($3::text[])[1 + (random() * 5)::int] || ' ' || n,
+            1 + (random() * 4)::int,
+            ($4::text[])[1 + (random() * 9)::int]
+        FROM generate_series(1, $5) AS n
+        """,
+        WORDS_1, WORDS_2, WORDS_3, LOCATIONS, rows,
+    )
+    await conn.execute("ALTER TABLE bench_hotels ADD PRIMARY KEY (id)")
+    await conn.execute("ANALYZE bench_hotels")
+
+
+async def explain(conn: asyncpg.Connection, term: str, label: str):
+    """ Print plans and execution time for every search query """
+    for name, query in SEARCH_QUERIES.items():
+        started = time.perf_counter()
+        plan = await conn.fetch(f"EXPLAIN (ANALYZE, BUFFERS) {query}", term)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"--- {label} / {name}: {elapsed:.1f} ms")
+        for row in plan:
+            print(row[0])
+        print()
+
+
+async def main(rows: int, term: str):
+    conn = await asyncpg.connect(dsn())
+    try:
+        print(f"Seeding {rows} hotels...")
+        await seed(conn, rows)
+        await explain(conn, term, "without indexes")
+        await conn.execute("CREATE INDEX ON bench_hotels USING gin (title gin_trgm_ops)")
+        await conn.execute("CREATE INDEX ON bench_hotels USING gin (location gin_trgm_ops)")
+        await conn.execute("ANALYZE bench_hotels")
+        await explain(conn, term, "with trigram indexes")
+    finally:
+        await conn.execute("DROP TABLE IF EXISTS bench_hotels")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hotel search plan benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of generated hotels")
+    parser.add_argument("--term", default="ocea", help="Search term")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.term))
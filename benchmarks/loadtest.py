@@ -0,0 +1,312 @@
+"""
+End-to-end load test of the app: replays a weighted mix of hotel search, room detail,
+login and booking requests (and hotel_page, not in the default mix) and reports throughput, p50/p95/p99 latency and DB queries
+per request (from Server-Timing header) for each endpoint. Results are saved as JSON in benchmarks/results to compare runs.
+
+inprocess mode drives main:app through httpx ASGITransport (with the app lifespan entered, as uvicorn does), without network and server overhead,
+socket mode runs uvicorn (or uses --base-url of a running app) and sends requests over TCP.
+Needs a local Postgres filled by test_data.py (users with password "password123").
+
+Usage:
+    python test_data.py --preset small --truncate
+    python -m benchmarks.loadtest --mode inprocess --duration 30 --concurrency 32
+    python -m benchmarks.loadtest --mode socket --workers 4 --mix search=60,room=25,login=5,booking=10
+    python -m benchmarks.loadtest --mode socket --base-url http://localhost:8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import asyncpg
+import httpx
+from src.config import settings
+from src.utils.query_budget import route_budget
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+DEFAULT_MIX = "search=60,room=25,login=5,booking=10"
+# Responses which are expected outcomes, not errors
+EXPECTED_STATUSES = {
+    "search": {200, 404},
+    "room": {200, 304},
+    "login": {200},
+    "booking": {201, 409},
+    "hotel_page": {200},
+}
+# Route of each request kind, for query budgets
+ROUTES = {
+    "search": ("GET", "/hotels/"),
+    "room": ("GET", "/hotels/{hotel_id}/rooms/{room_id}"),
+    "login": ("POST", "/auth/login"),
+    "booking": ("POST", "/bookings/"),
+    "hotel_page": ("GET", "/hotels/{hotel_id}/full"),
+}
+SEARCH_LOCATIONS = [None, None, "Paris", "Bali", "New York", "Miami", "Tokyo"]
+
+# Statements and batch loads among them in Server-Timing header of src.utils.timing.SQLTimingMiddleware
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries, (\d+) batch loads')
+
+
+def dsn() -> str:
+    return f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in EXPECTED_STATUSES:
+            raise argparse.ArgumentTypeError(f"unknown request kind {name}, expected one of {', '.join(EXPECTED_STATUSES)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+async def load_fixtures(users: int) -> dict:
+    """ Sample rooms and users of the database to build requests """
+    connection = await asyncpg.connect(dsn())
+    try:
+        rooms = await connection.fetch("SELECT id, hotel_id FROM rooms ORDER BY random() LIMIT 1000")
+        emails = await connection.fetch("SELECT email FROM users ORDER BY id LIMIT $1", users)
+    finally:
+        await connection.close()
+    if not rooms or not emails:
+        raise SystemExit("No rooms or users in the database, run test_data.py first")
+    return {"rooms": [(room["hotel_id"], room["id"]) for room in rooms], "emails": [row["email"] for row in emails]}
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, fixtures: dict, args):
+        self.client = client
+        self.fixtures = fixtures
+        self.args = args
+        self.weights = parse_mix(args.mix)
+        self.results = defaultdict(lambda: {"latencies": [], "queries": [], "budgeted_queries": [], "statuses": defaultdict(int)})
+
+    def random_stay(self, rng: random.Random, days_ahead: int = 365) -> tuple[date, date]:
+        check_in = date.today() + timedelta(days=rng.randint(1, days_ahead))
+        return check_in, check_in + timedelta(days=rng.randint(1, 7))
+
+    async def send(self, rng: random.Random, kind: str, access_token: str) -> None:
+        match kind:
+            case "search":
+                check_in, check_out = self.random_stay(rng)
+                params = {"check_in": str(check_in), "check_out": str(check_out), "per_page": 20}
+                location = rng.choice(SEARCH_LOCATIONS)
+                if location:
+                    params["location"] = location
+                request = self.client.build_request("GET", "/hotels/", params=params)
+            case "room":
+                hotel_id, room_id = rng.choice(self.fixtures["rooms"])
+                request = self.client.build_request("GET", f"/hotels/{hotel_id}/rooms/{room_id}")
+            case "hotel_page":
+                hotel_id, _ = rng.choice(self.fixtures["rooms"])
+                request = self.client.build_request("GET", f"/hotels/{hotel_id}/full")
+            case "login":
+                credentials = {"email": rng.choice(self.fixtures["emails"]), "password": self.args.password}
+                request = self.client.build_request("POST", "/auth/login", json=credentials)
+            case "booking":
+                _, room_id = rng.choice(self.fixtures["rooms"])
+                # Far future nights, so bookings of repeated runs mostly don't collide
+                check_in, check_out = self.random_stay(rng, days_ahead=3650)
+                payload = {"room_id": room_id, "check_in": str(check_in), "check_out": str(check_out)}
+                request = self.client.build_request("POST", "/bookings/", json=payload, headers={"Cookie": f"access_token={access_token}"})
+
+        queries = batch_loads = None
+        started = time.perf_counter()
+        try:
+            response = await self.client.send(request)
+            status = response.status_code
+            match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+            if match:
+                queries, batch_loads = int(match.group(1)), int(match.group(2))
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        elapsed = (time.perf_counter() - started) * 1000
+        result = self.results[kind]
+        result["latencies"].append(elapsed)
+        result["statuses"][status] += 1
+        if queries is not None:
+            result["queries"].append(queries)
+            # Eager relationship batches are not counted against query budgets
+            result["budgeted_queries"].append(queries - batch_loads)
+
+    async def login(self, email: str) -> str:
+        response = await self.client.post("/auth/login", json={"email": email, "password": self.args.password})
+        response.raise_for_status()
+        return response.json()["data"]["access_token"]
+
+    async def virtual_user(self, number: int, deadline: float) -> None:
+        """ Sends requests of the mix one after another until the deadline """
+        rng = random.Random(f"{self.args.seed}:{number}")
+        access_token = await self.login(self.fixtures["emails"][number % len(self.fixtures["emails"])])
+        kinds, weights = list(self.weights), list(self.weights.values())
+        while time.perf_counter() < deadline:
+            await self.send(rng, rng.choices(kinds, weights)[0], access_token)
+
+    async def run(self, duration: float) -> float:
+        started = time.perf_counter()
+        await asyncio.gather(*(self.virtual_user(number, started + duration) for number in range(self.args.concurrency)))
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for kind, result in sorted(self.results.items()):
+            latencies = result["latencies"]
+            errors = sum(count for status, count in result["statuses"].items() if status not in EXPECTED_STATUSES[kind])
+            endpoints[kind] = {
+                "requests": len(latencies),
+                "throughput_rps": round(len(latencies) / elapsed, 1),
+                "errors": errors,
+                "statuses": {str(status): count for status, count in result["statuses"].items()},
+                "latency_ms": {
+                    "p50": round(statistics.median(latencies), 2),
+                    "p95": round(percentile(latencies, 95), 2),
+                    "p99": round(percentile(latencies, 99), 2),
+                    "max": round(max(latencies), 2),
+                },
+                "queries_per_request": round(statistics.mean(result["queries"]), 2) if result["queries"] else None,
+                "max_queries": max(result["queries"], default=None),
+                "max_budgeted_queries": max(result["budgeted_queries"], default=None),
+                "query_budget": route_budget(*ROUTES[kind]),
+                "over_budget": sum(queries > route_budget(*ROUTES[kind]) for queries in result["budgeted_queries"]),
+            }
+        return {
+            "total_requests": sum(endpoint["requests"] for endpoint in endpoints.values()),
+            "throughput_rps": round(sum(len(result["latencies"]) for result in self.results.values()) / elapsed, 1),
+            "elapsed_s": round(elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def start_uvicorn(workers: int) -> tuple[subprocess.Popen, str]:
+    """ Run the app with uvicorn in a subprocess and wait until it accepts requests """
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env={**os.environ, "DB_PROFILE": os.environ.get("DB_PROFILE", "bench")},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(300):
+            if process.poll() is not None:
+                raise SystemExit("uvicorn exited on startup")
+            try:
+                await client.get("/openapi.json")
+                return process, base_url
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    process.terminate()
+    raise SystemExit("uvicorn did not start in 30 seconds")
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args):
+    fixtures = await load_fixtures(args.concurrency)
+    process = None
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with AsyncExitStack() as stack:
+            if args.mode == "inprocess":
+                from main import app
+                # ASGITransport does not send lifespan events, run startup (bcrypt calibration) as uvicorn does
+                await stack.enter_async_context(app.router.lifespan_context(app))
+                transport = httpx.ASGITransport(app=app)
+                base_url = "http://loadtest"
+            else:
+                base_url = args.base_url
+                if base_url is None:
+                    process, base_url = await start_uvicorn(args.workers)
+                transport = None
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60)
+            )
+            if args.warmup:
+                await LoadTest(client, fixtures, args).run(args.warmup)
+            load_test = LoadTest(client, fixtures, args)
+            elapsed = await load_test.run(args.duration)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "mode": args.mode,
+        "workers": args.workers if args.mode == "socket" and args.base_url is None else None,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "mix": parse_mix(args.mix),
+        "db_profile": os.environ.get("DB_PROFILE", settings.DB_PROFILE),
+        **load_test.report(elapsed),
+    }
+
+    print(f"{'endpoint':<10}{'requests':>10}{'rps':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+    for kind, endpoint in report["endpoints"].items():
+        latency = endpoint["latency_ms"]
+        queries = endpoint["queries_per_request"]
+        print(
+            f"{kind:<10}{endpoint['requests']:>10}{endpoint['throughput_rps']:>10}{endpoint['errors']:>8}"
+            f"{latency['p50']:>10}{latency['p95']:>10}{latency['p99']:>10}{'-' if queries is None else queries:>9}"
+        )
+    print(f"Total: {report['total_requests']} requests, {report['throughput_rps']} rps")
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{args.mode}.json"
+    Path(path).write_text(json.dumps(report, indent=2))
+    print(f"Results saved to {path}")
+
+    over_budget = {kind: endpoint for kind, endpoint in report["endpoints"].items() if endpoint["over_budget"]}
+    for kind, endpoint in over_budget.items():
+        print(f"FAIL: {endpoint['over_budget']} {kind} requests over budget of {endpoint['query_budget']} queries (max {endpoint['max_budgeted_queries']})")
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test of search, room detail, login and booking requests")
+    parser.add_argument("--mode", choices=["inprocess", "socket"], default="inprocess")
+    parser.add_argument("--base-url", help="socket mode: URL of a running app instead of starting uvicorn")
+    parser.add_argument("--workers", type=int, default=1, help="socket mode: uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users sending requests in parallel")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of load before measuring, 0 to skip")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"request weights, default {DEFAULT_MIX}")
+    parser.add_argument("--password", default="password123", help="password of generated users")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="results file, default benchmarks/results/<time>-<mode>.json")
+    args = parser.parse_args()
+    try:
+        parse_mix(args.mix)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(f"invalid --mix: {e}")
+    asyncio.run(main(args))
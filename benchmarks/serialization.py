@@ -0,0 +1,121 @@
+"""
+Benchmark of list response serialization: FastAPI response_model path against pydantic-core fast path.
+
+Builds rows shaped like ORM objects of rooms with facilities (no database needed) and times:
+  - validation: model_validate per row against one TypeAdapter call for the list
+  - serialization: jsonable_encoder + json.dumps against TypeAdapter.dump_json
+  - endpoint: the same list returned without response_model (jsonable_encoder), through
+    response_model and through json_list_response
+
+Usage:
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from src.schemas.rooms import RoomsWithFacilities
+from src.utils.serialization import json_list_response, list_adapter
+
+FACILITIES_PER_ROOM = 3
+
+
+def make_rows(count: int) -> list[SimpleNamespace]:
+    """ Attribute objects like ORM rows with loaded facilities """
+    facilities = [
+        SimpleNamespace(id=i, title=f"Facility {i}", description=f"Description of facility {i}", version=1)
+        for i in range(1, 11)
+    ]
+    return [
+        SimpleNamespace(
+            id=i,
+            hotel_id=i % 100 + 1,
+            room_type_id=i % 5 + 1,
+            number=str(i % 1000),
+            title=f"Room {i}",
+            description=f"Description of room {i}",
+            price=1000 + i % 500,
+            version=1,
+            facilities=facilities[i % 7:i % 7 + FACILITIES_PER_ROOM],
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def best_of(repeat: int, func) -> float:
+    """ Best wall time of repeated calls, in milliseconds """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def make_app(rooms: list[RoomsWithFacilities]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/encoder")
+    async def encoder_path():
+        return rooms
+
+    @app.get("/response_model", response_model=list[RoomsWithFacilities])
+    async def response_model_path():
+        return rooms
+
+    @app.get("/fast", response_model=list[RoomsWithFacilities])
+    async def fast_path():
+        return json_list_response(RoomsWithFacilities, rooms)
+
+    return app
+
+
+def report(title: str, baseline: float, fast: float):
+    print(f"{title:<24} baseline {baseline:9.1f} ms   fast {fast:9.1f} ms   x{baseline / fast:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list response serialization")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows in the list")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of every case, the best one is reported")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    adapter = list_adapter(RoomsWithFacilities)
+    rooms = adapter.validate_python(rows, from_attributes=True)
+
+    print(f"{args.rows} rooms with {FACILITIES_PER_ROOM} facilities, best of {args.repeat}")
+    report(
+        "validation",
+        best_of(args.repeat, lambda: [RoomsWithFacilities.model_validate(row, from_attributes=True) for row in rows]),
+        best_of(args.repeat, lambda: adapter.validate_python(rows, from_attributes=True)),
+    )
+    report(
+        "serialization",
+        best_of(args.repeat, lambda: json.dumps(jsonable_encoder(rooms)).encode()),
+        best_of(args.repeat, lambda: adapter.dump_json(rooms)),
+    )
+
+    client = TestClient(make_app(rooms))
+    expected = json.loads(client.get("/fast").content)
+    assert json.loads(client.get("/encoder").content) == expected
+    assert json.loads(client.get("/response_model").content) == expected
+    report(
+        "endpoint, no model",
+        best_of(args.repeat, lambda: client.get("/encoder")),
+        best_of(args.repeat, lambda: client.get("/fast")),
+    )
+    report(
+        "endpoint, response_model",
+        best_of(args.repeat, lambda: client.get("/response_model")),
+        best_of(args.repeat, lambda: client.get("/fast")),
+    )
+
+
+if __name__ == "__main__":
+    main()
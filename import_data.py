@@ -0,0 +1,61 @@
+"""
+Bulk import of hotels, rooms and room facilities from CSV (with header) or NDJSON files.
+
+Usage:
+    python import_data.py hotels hotels.csv
+    python import_data.py rooms rooms.ndjson
+    python import_data.py room_facilities room_facilities.csv
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import get_args
+
+from src.api.dependencies import DBManager
+from src.schemas.imports import ImportFormat, ImportKind
+from src.services.bulk_import import import_records
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+FILE_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+async def read_chunks(path: Path):
+    with path.open("rb") as file:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            yield chunk
+
+
+async def main(kind: ImportKind, path: Path, file_format: ImportFormat, dry_run: bool) -> int:
+    started = time.perf_counter()
+    async with DBManager() as db:
+        result = await import_records(db, kind, file_format, read_chunks(path))
+        if not dry_run:
+            await db.commit()
+    elapsed = time.perf_counter() - started
+
+    for error in result.errors:
+        print(f"line {error.line}: {error.detail}", file=sys.stderr)
+    if result.failed > len(result.errors):
+        print(f"... and {result.failed - len(result.errors)} more errors", file=sys.stderr)
+    print(
+        f"{kind}: {result.received} rows, {result.imported} imported, {result.failed} failed "
+        f"in {elapsed:.1f}s ({result.received / elapsed:.0f} rows/s)" + (" (dry run, rolled back)" if dry_run else "")
+    )
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import of hotels, rooms and room facilities")
+    parser.add_argument("kind", choices=get_args(ImportKind), help="kind of imported records")
+    parser.add_argument("path", type=Path, help="CSV or NDJSON file")
+    parser.add_argument("--format", dest="file_format", choices=get_args(ImportFormat), help="file format, by default from file extension")
+    parser.add_argument("--dry-run", action="store_true", help="validate and merge, then roll back")
+    args = parser.parse_args()
+
+    file_format = args.file_format or FILE_FORMATS.get(args.path.suffix.lower())
+    if file_format is None:
+        parser.error("can't detect file format from extension, use --format")
+    sys.exit(asyncio.run(main(args.kind, args.path, file_format, args.dry_run)))
@@ -1,21 +1,48 @@
+import asyncio
 import uvicorn
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from src.api.hotels import router as router_hotels
 from src.api.auth import router as router_auth
 from src.api.rooms import router as router_rooms
 from src.api.bookings import router as router_bookings
 from src.api.facilities import router as router_facilities
+from src.api.imports import router as router_imports
+from src.api.metrics import router as router_metrics
+from src.services.auth import AuthService
+from src.db import engine
+from src.utils.metrics import MetricsMiddleware, instrument_pool, mark_process_dead
+from src.utils.timing import SQLTimingMiddleware, install_sql_hooks
 
 logger = logging.getLogger("uvicorn")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pick bcrypt cost for the target hashing time on this hardware
+    rounds = await asyncio.get_running_loop().run_in_executor(AuthService.hash_executor, AuthService.calibrate_bcrypt_rounds)
+    logger.info(f"bcrypt cost set to {rounds} rounds")
+    yield
+    mark_process_dead()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Statements, DB time and rows per request in Server-Timing header and request log
+install_sql_hooks(engine)
+app.add_middleware(SQLTimingMiddleware)
+# Route latency histograms and DB pool gauges for /metrics
+instrument_pool(engine)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(router_auth)
 app.include_router(router_hotels)
 app.include_router(router_rooms)
 app.include_router(router_bookings)
 app.include_router(router_facilities)
+app.include_router(router_imports)
+app.include_router(router_metrics)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Maintenance of room_nights inventory: backfill nights of bookings written without the app
+(COPY, manual fixes) and check that room_nights matches bookings.
+
+Usage:
+    python room_nights.py backfill
+    python room_nights.py check --limit 20
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from src.api.dependencies import DBManager
+
+
+async def backfill() -> int:
+    started = time.perf_counter()
+    async with DBManager() as db:
+        inserted = await db.room_nights.backfill()
+        await db.commit()
+    print(f"{inserted} room nights inserted in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+async def check(limit: int) -> int:
+    async with DBManager() as db:
+        missing, stray = await db.room_nights.check(limit=limit)
+    for booking_id, room_id, night in missing:
+        print(f"missing: booking {booking_id} room {room_id} night {night}", file=sys.stderr)
+    for booking_id, room_id, night in stray:
+        print(f"stray: booking {booking_id} room {room_id} night {night}", file=sys.stderr)
+    if not missing and not stray:
+        print("room_nights is consistent with bookings")
+        return 0
+    print(
+        f"room_nights is inconsistent: {len(missing)} missing and {len(stray)} stray nights (up to {limit} of each shown). "
+        "Missing nights are added by backfill unless another booking holds the night."
+    )
+    return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintenance of room_nights inventory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("backfill", help="insert missing nights of existing bookings")
+    check_parser = commands.add_parser("check", help="compare room_nights with bookings, exit code 1 if they differ")
+    check_parser.add_argument("--limit", type=int, default=100, help="most reported nights of each kind")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        sys.exit(asyncio.run(backfill()))
+    sys.exit(asyncio.run(check(args.limit)))
@@ -1,12 +1,12 @@
 from fastapi.openapi.models import Example
-from fastapi import APIRouter, Body
-from fastapi.responses import Response, JSONResponse
+from fastapi import APIRouter, Body, Request
+from fastapi.responses import JSONResponse
 
 from src.api.dependencies import UserIdDep
 from src.services.auth import AuthService
 from src.repositories.users import UsersRepository, UsersRepositoryLogin
 from src.db import async_session_maker
-from src.schemas.users import UserAddToDB, UserRequestCreate, UserRequestLogin, UserResponse
+from src.schemas.users import UserAddToDB, UserPasswordUpdate, UserRequestCreate, UserRequestLogin, UserResponse
 
 router = APIRouter(
     prefix="/auth",
@@ -31,7 +31,7 @@ async def register_user(
     """Register a new user"""
 
     #   Hash password and remove raw_password from data
-    add_data = UserAddToDB(email=data.email, password=AuthService().hash_password(data.raw_password))
+    add_data = UserAddToDB(email=data.email, password=await AuthService().hash_password_async(data.raw_password))
 
     try:
     #   Add user to database
@@ -39,15 +39,15 @@ async def register_user(
                 user_added = await UsersRepository(session).add(add_data)
                 await session.commit()
     except Exception as e:
-        return Response(status_code=400, content={"detail": "User not created", "data": str(e.orig).split('\nDETAIL:')[1]})
+        return JSONResponse(status_code=400, content={"detail": "User not created", "data": str(e.orig).split('\nDETAIL:')[1]})
 
     #   Check if user was added
     if user_added:
         #   Return response with added user data
-        return Response(status_code=200, content={"detail": "User created", "data": user_added.model_dump()})
+        return JSONResponse(status_code=200, content={"detail": "User created", "data": user_added.model_dump()})
     else:
         #   Return response with error message
-        return Response(status_code=400, content={"detail": "User not created", "data": None})
+        return JSONResponse(status_code=400, content={"detail": "User not created", "data": None})
 
 
 @router.post("/login")
@@ -66,8 +66,18 @@ async def login_user(
     async with async_session_maker() as session:
         user = await UsersRepositoryLogin(session).get_one_or_none(email=data.email)
 
-    if not user or not AuthService().verify_password(data.raw_password, user.password):
-        return Response(status_code=401, content={"detail": "Invalid credentials", "data": None})
+    if not user:
+        return JSONResponse(status_code=401, content={"detail": "Invalid credentials", "data": None})
+    password_valid, new_password_hash = await AuthService().verify_and_update_password(data.raw_password, user.password)
+    if not password_valid:
+        return JSONResponse(status_code=401, content={"detail": "Invalid credentials", "data": None})
+
+    # Rehash password if it was hashed with another bcrypt cost
+    if new_password_hash:
+        async with async_session_maker() as session:
+            await UsersRepository(session).edit(UserPasswordUpdate(password=new_password_hash), partial_update=True, id=user.id)
+            await session.commit()
+
     access_token = AuthService().create_access_token({"id": user.id})
 
     # Insert access token to cookies
@@ -77,8 +87,11 @@ async def login_user(
 
 
 @router.post("/logout")
-async def logout_user(response: Response):
+async def logout_user(request: Request):
     """Logout a user"""
+    token = request.cookies.get("access_token")
+    if token:
+        AuthService().forget_token(token)
     response = JSONResponse(status_code=200, content={"detail": "Logout successful", "data": None})
     response.delete_cookie(key="access_token", secure=True, samesite="Strict")
     return response
@@ -88,11 +101,15 @@ async def logout_user(response: Response):
 async def is_auth(user_id: UserIdDep):
     """Check if user is authenticated"""
     if user_id:
-        async with async_session_maker() as session:
-            user = await UsersRepository(session).get_one_or_none(id=user_id)
+        user = AuthService.user_cache.get(user_id)
+        if user is None:
+            async with async_session_maker() as session:
+                user = await UsersRepository(session).get_one_or_none(id=user_id)
             if user:
-                return JSONResponse(status_code=200, content={"detail": "User is authenticated", "data": user.model_dump()})
-            else:
-                return JSONResponse(status_code=404, content={"detail": "User not found", "data": None})
+                AuthService.user_cache.set(user_id, user)
+        if user:
+            return JSONResponse(status_code=200, content={"detail": "User is authenticated", "data": user.model_dump()})
+        else:
+            return JSONResponse(status_code=404, content={"detail": "User not found", "data": None})
     else:
         return JSONResponse(status_code=401, content={"detail": "User is not authenticated", "data": None})
\ No newline at end of file
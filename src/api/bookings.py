@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, Path, Query, Body, status
+from fastapi import APIRouter, HTTPException, Path, Query, Body, Request, status
 import logging
 from typing import List, Any
 from datetime import datetime
 
 from fastapi.openapi.models import Example
 
-from src.api.dependencies import DBDep, UserIdDep
-from src.schemas.bookings import BookingCreateRequest, Booking, BookingAdd
+from src.api.dependencies import DBDep, DBManager, UserIdDep
+from src.schemas.bookings import (
+    BookingBatchError,
+    BookingBatchRequest,
+    BookingBatchResponse,
+    BookingCreateRequest,
+    Booking,
+)
+from src.utils.serialization import json_list_response
+from src.utils.streaming import stream_media_type, stream_response
 
 logger = logging.getLogger("uvicorn")
 
@@ -20,16 +28,28 @@ async def get_user_bookings(
 ):
     """Get all bookings for a user"""
     bookings = await db.bookings.get_all(user_id=user_id)
-    return bookings
+    return json_list_response(Booking, bookings)
 
 @router.get("/", response_model=List[Booking])
-async def get_all_bookings(db: DBDep):
-    """Get all bookings for all users"""
+async def get_all_bookings(db: DBDep, request: Request):
+    """
+    Get all bookings for all users.
+    Send Accept: application/x-ndjson or text/csv to stream rows instead of building one JSON array.
+    """
+    media_type = stream_media_type(request)
+    if media_type:
+        async def bookings_stream():
+            # Own session: the request session is closed before the response body is streamed
+            async with DBManager() as stream_db:
+                async for booking in stream_db.bookings.stream_all():
+                    yield booking
+        return stream_response(bookings_stream(), media_type)
+
     bookings = await db.bookings.get_all()
-    return bookings
+    return json_list_response(Booking, bookings)
 
 
-@router.post("/", response_model=Booking, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=Booking, status_code=status.HTTP_201_CREATED, responses={409: {"description": "Room is already booked for these dates"}})
 async def create_booking(
     db: DBDep,
     user_id: UserIdDep,
@@ -56,40 +76,68 @@ async def create_booking(
             detail="Check-out date must be after check-in date and not in the past"
         )
     
-    # Check if room exists
-    room = await db.rooms.get_one_or_none(id=booking_data.room_id)
-    if not room:
+    # Room and hotel lookup, price calculation, booking and room nights insert in one statement,
+    # concurrent bookings of the same nights get 409 from room_nights primary key
+    booking_added = await db.bookings.add_for_room(
+        user_id=user_id,
+        room_id=booking_data.room_id,
+        check_in=booking_data.check_in,
+        check_out=booking_data.check_out
+    )
+    if not booking_added:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Room with ID {booking_data.room_id} not found"
         )
+    await db.commit()
     
-    # Get hotel information for check-in/check-out times  
-    hotel = await db.hotels.get_one_or_none(id=room.hotel_id)
-    if not hotel:
+    # Convert to response schema
+    return booking_added
+
+
+@router.post("/batch", response_model=BookingBatchResponse, status_code=status.HTTP_201_CREATED, responses={409: {"description": "Some rooms can not be booked (all_or_nothing mode)"}})
+async def create_bookings_batch(
+    db: DBDep,
+    user_id: UserIdDep,
+    batch: BookingBatchRequest = Body(openapi_examples={
+        "Batch 1": Example(
+            summary="Book two rooms",
+            value={
+                "items": [
+                    {"room_id": 1, "check_in": "2025-07-01", "check_out": "2025-07-03"},
+                    {"room_id": 2, "check_in": "2025-07-01", "check_out": "2025-07-03"},
+                ],
+                "mode": "all_or_nothing",
+            }
+        )
+    })
+):
+    """
+    Create several bookings at once.
+    all_or_nothing: nothing is booked if any item fails (409 with per-item errors).
+    best_effort: failed items are reported in errors, the rest are booked.
+    """
+    today = datetime.now().date()
+    errors = []
+    items = []
+    for index, item in enumerate(batch.items):
+        if item.check_out <= item.check_in or item.check_in <= today:
+            errors.append(BookingBatchError(
+                index=index,
+                detail="Check-out date must be after check-in date and not in the past"
+            ))
+        else:
+            items.append((index, item))
+
+    best_effort = batch.mode == "best_effort"
+    created = []
+    if items and (best_effort or not errors):
+        created, booking_errors = await db.bookings.add_batch(user_id, items, best_effort=best_effort)
+        errors = sorted(errors + booking_errors, key=lambda error: error.index)
+    if errors and not best_effort:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Hotel for room {booking_data.room_id} not found"
+            status_code=status.HTTP_409_CONFLICT,
+            detail=[error.model_dump() for error in errors]
         )
-    
-    # Calculate check_in_datetime and check_out_datetime
-    check_in_datetime = datetime.combine(booking_data.check_in, hotel.check_in)
-    check_out_datetime = datetime.combine(booking_data.check_out, hotel.check_out)
-    
-    # Calculate the total price of a booking
-    total_price = (booking_data.check_out - booking_data.check_in).days * room.price
-    
-    # Create booking instance directly in database
-    booking_orm = BookingAdd(
-        user_id=user_id,
-        room_id=booking_data.room_id,
-        total_price=total_price,
-        check_in=check_in_datetime,
-        check_out=check_out_datetime
-    )
-    
-    booking_added = await db.bookings.add(booking_orm)
     await db.commit()
-    
-    # Convert to response schema
-    return booking_added
\ No newline at end of file
+    return BookingBatchResponse(created=created, errors=errors)
\ No newline at end of file
@@ -4,16 +4,19 @@ import jwt
 
 from src.services.auth import AuthService
 from src.db import async_session_maker
+from src.cache import discard_pending_invalidations, invalidate_after_commit
 
 # repositories
 from src.repositories.hotels import HotelsRepository
 from src.repositories.rooms import RoomsRepository, RoomTypesRepository
 from src.repositories.users import UsersRepository
-from src.repositories.bookings import BookingsRepository
+from src.repositories.bookings import BookingsRepository, RoomNightsRepository
 from src.repositories.faciliries import FacilitiesRepository, RoomsFacilitiesRepository
 
+auth_service = AuthService()
 
-def get_token(request: Request):
+
+async def get_token(request: Request):
     """Get the token from the request"""
     token = request.cookies.get("access_token", None)
     if token:
@@ -21,10 +24,14 @@ def get_token(request: Request):
     else:
         raise HTTPException(status_code=401, detail="Unauthenticated")
 
-def get_current_user_id(token: str = Depends(get_token)) -> int:
-    """Get the current user id from the request"""
+async def get_current_user_id(token: str = Depends(get_token)) -> int:
+    """Get the current user id from the request.
+
+    Async on purpose: decoding is cheap, and running it on the event loop keeps
+    the unlocked token TTLCache off the threadpool.
+    """
     try:
-        user_id = AuthService().decode_token(token)["id"]
+        user_id = auth_service.decode_token_cached(token)["id"]
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
@@ -46,6 +53,7 @@ class DBManager:
         self.hotels = HotelsRepository(self.session)
         self.users = UsersRepository(self.session)
         self.bookings = BookingsRepository(self.session)
+        self.room_nights = RoomNightsRepository(self.session)
         self.facilities = FacilitiesRepository(self.session)
         self.rooms_facilities = RoomsFacilitiesRepository(self.session)
         self.room_types = RoomTypesRepository(self.session)
@@ -54,10 +62,13 @@ class DBManager:
 
     async def __aexit__(self, exc_type, exc_value, traceback):
         await self.session.rollback()
+        discard_pending_invalidations(self.session.info)
         await self.session.close()
     
     async def commit(self):
         await self.session.commit()
+        # Invalidate cached reads of records changed in the committed transaction
+        await invalidate_after_commit(self.session.info)
 
 UserIdDep = Annotated[int, Depends(get_current_user_id)]
 DBDep = Annotated[DBManager, Depends(get_db)]
\ No newline at end of file
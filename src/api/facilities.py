@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Path, Query, Body, status
+from fastapi import APIRouter, HTTPException, Path, Query, Body, Request, Response, status
 import logging
 from typing import List, Any
 from datetime import datetime
@@ -7,6 +7,8 @@ from fastapi.openapi.models import Example
 
 from src.api.dependencies import DBDep
 from src.schemas.facilities import Facilities, FacilitiesCreateRequest
+from src.utils.etag import collection_version, etag_matches, make_etag, not_modified
+from src.utils.serialization import json_list_response
 
 logger = logging.getLogger("uvicorn")
 
@@ -14,10 +16,14 @@ router = APIRouter(prefix="/facilities", tags=["Facilities"])
 
 
 @router.get("/", response_model=List[Facilities], summary="Get all facilities")
-async def get_facilities(db: DBDep):
-    """Get all available facilities"""
+async def get_facilities(db: DBDep, request: Request):
+    """Get all available facilities, returns 304 if facilities have not changed since If-None-Match ETag"""
+    if request.headers.get("if-none-match"):
+        etag = make_etag(*await db.facilities.get_collection_version())
+        if etag_matches(request, etag):
+            return not_modified(etag)
     facilities = await db.facilities.get_all()
-    return facilities
+    return json_list_response(Facilities, facilities, headers={"ETag": make_etag(*collection_version(facilities))})
 
 
 @router.post("/", response_model=Facilities, status_code=status.HTTP_201_CREATED, summary="Create new facility")
@@ -1,18 +1,24 @@
 from datetime import date
-from fastapi import APIRouter, HTTPException, Path, Query, Body, status
+from fastapi import APIRouter, HTTPException, Path, Query, Body, Request, status
 import logging
-from typing import List
+from typing import List, Literal
 
 from fastapi.openapi.models import Example
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 from src.api.dependencies import DBDep
-from src.schemas.hotels import HotelPartialData, HotelCreateData, Hotel
+from src.schemas.hotels import HotelPartialData, HotelCreateData, Hotel, HotelCalendarDay, HotelWithRooms
+from src.utils.etag import etag_matches, make_etag, not_modified
+from src.utils.pagination import decode_cursor, encode_cursor
+from src.utils.serialization import JSON_MEDIA_TYPE, json_list_response
 
 logger = logging.getLogger("uvicorn")
 
 router = APIRouter(prefix="/hotels", tags=["Hotels"])
 
+# Longest window of the occupancy calendar, bounds the nights x rooms join
+MAX_CALENDAR_DAYS = 90
+
 
 @router.get("/", response_model=List[Hotel], summary="Get list of available hotels for given check-in and check-out dates")
 async def get_hotels(
@@ -22,35 +28,104 @@ async def get_hotels(
     page: int = Query(default=1, description="Page number", ge=1),
     per_page: int = Query(default=3, description="Number of items per page", ge=1, le=100),
     check_in: date = Query(description="Check-in date", example="2025-07-01"),
-    check_out: date = Query(description="Check-out date", example="2025-07-20")
+    check_out: date = Query(description="Check-out date", example="2025-07-20"),
+    cursor: str | None = Query(default=None, description="Cursor from X-Next-Cursor header of the previous page, replaces page number"),
+    order_by: Literal["id", "relevance"] = Query(default="id", description="Sort by ID or by similarity to title and location (fuzzy search)"),
 ):
-    """ Get list of available hotels for given check-in and check-out dates """
+    """
+    Get list of available hotels for given check-in and check-out dates.
+    Cursor of the next page is returned in X-Next-Cursor header.
+    """
+    after = decode_cursor(cursor) if cursor else {}
+    after_id, after_relevance = after.get("id"), after.get("relevance")
+    if cursor and (
+        not isinstance(after_id, int) or
+        not isinstance(after_relevance, (int, float, type(None)))
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    # Fetch one extra row to know if there is a next page
     hotels = await db.hotels.get_available_hotels( 
             check_in=check_in,
             check_out=check_out,
-            limit=per_page,
+            limit=per_page + 1,
             offset=(page - 1) * per_page,
             title=title, 
-            location=location
+            location=location,
+            order_by=order_by,
+            after_id=after_id,
+            after_relevance=after_relevance
         )
-    return hotels
+    headers = {}
+    if len(hotels) > per_page:
+        hotels = hotels[:per_page]
+        last = hotels[-1]
+        headers["X-Next-Cursor"] = (
+            encode_cursor(id=last.id, relevance=last.relevance) if last.relevance is not None
+            else encode_cursor(id=last.id)
+        )
+    return json_list_response(Hotel, hotels, headers=headers)
 
 
 @router.get("/{hotel_id}", response_model=Hotel)
 async def get_hotel(
     db: DBDep,
+    request: Request,
+    response: Response,
     hotel_id: int = Path(description="ID of the hotel", gt=0),
 ):
-    """ Get hotel by ID """
+    """ Get hotel by ID, returns 304 if hotel has not changed since If-None-Match ETag """
+    if request.headers.get("if-none-match"):
+        version = await db.hotels.get_version(id=hotel_id)
+        if version is not None and etag_matches(request, make_etag(hotel_id, version)):
+            return not_modified(make_etag(hotel_id, version))
     hotel = await db.hotels.get_one_or_none(id=hotel_id)
     if not hotel:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Hotel with ID {hotel_id} not found"
         )
+    response.headers["ETag"] = make_etag(hotel.id, hotel.version)
     return hotel
 
 
+@router.get("/{hotel_id}/full", response_model=HotelWithRooms, summary="Get hotel with rooms, room types and facilities")
+async def get_hotel_full(
+    db: DBDep,
+    hotel_id: int = Path(description="ID of the hotel", gt=0),
+):
+    """ Get hotel page data in one query: JSON is built by Postgres and sent as is, without validation """
+    hotel_json = await db.hotels.get_full_json(hotel_id)
+    if hotel_json is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Hotel with ID {hotel_id} not found"
+        )
+    return Response(content=hotel_json, media_type=JSON_MEDIA_TYPE)
+
+
+@router.get("/{hotel_id}/calendar", response_model=list[HotelCalendarDay], summary="Get occupancy of hotel rooms by night")
+async def get_hotel_calendar(
+    db: DBDep,
+    hotel_id: int = Path(description="ID of the hotel", gt=0),
+    date_from: date = Query(alias="from", description="First night", example="2025-07-01"),
+    date_to: date = Query(alias="to", description="Day after the last night, like check-out date", example="2025-08-01"),
+):
+    """ Free and booked rooms and the lowest free room price for every night from the first night up to the day before to """
+    if date_to <= date_from or (date_to - date_from).days > MAX_CALENDAR_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"to must be after from and the window must be at most {MAX_CALENDAR_DAYS} days"
+        )
+    calendar = await db.hotels.get_calendar(hotel_id, date_from, date_to)
+    if not calendar:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Hotel with ID {hotel_id} not found"
+        )
+    return json_list_response(HotelCalendarDay, calendar)
+
+
 @router.post("/", response_model=Hotel, status_code=status.HTTP_201_CREATED)
 async def create_hotel(
     db: DBDep,
@@ -82,14 +157,6 @@ async def edit_hotel(
     })
 ):
     """ Update hotel with full parameters list """
-    # Check if hotel exists
-    existing_hotel = await db.hotels.get_one_or_none(id=hotel_id)
-    if not existing_hotel:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Hotel with ID {hotel_id} not found"
-        )
-    
     hotel_edited = await db.hotels.edit(hotel_data, id=hotel_id)
     await db.commit()
     return hotel_edited
@@ -101,14 +168,6 @@ async def delete_hotel(
     hotel_id: int = Path(description="ID of the hotel", gt=0),
 ):
     """ Delete hotel by ID """
-    # Check if hotel exists
-    existing_hotel = await db.hotels.get_one_or_none(id=hotel_id)
-    if not existing_hotel:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Hotel with ID {hotel_id} not found"
-        )
-    
     await db.hotels.delete(id=hotel_id)
     await db.commit()
 
@@ -125,14 +184,6 @@ async def update_hotel(
         })
     ):
     """ Partial Update hotel by ID and partial parameters list """
-    # Check if hotel exists
-    existing_hotel = await db.hotels.get_one_or_none(id=hotel_id)
-    if not existing_hotel:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Hotel with ID {hotel_id} not found"
-        )
-    
     hotel_edited = await db.hotels.edit(hotel_data, id=hotel_id, partial_update=True)
     await db.commit()
     return hotel_edited
\ No newline at end of file
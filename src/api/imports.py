@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, Path, Query, Request, status
+import logging
+
+from src.api.dependencies import DBDep
+from src.schemas.imports import ImportFormat, ImportKind, ImportResult
+from src.services.bulk_import import import_format, import_records
+
+logger = logging.getLogger("uvicorn")
+
+router = APIRouter(prefix="/imports", tags=["Imports"])
+
+
+@router.post("/{kind}", response_model=ImportResult, summary="Bulk import of hotels, rooms or room facilities")
+async def import_data(
+    db: DBDep,
+    request: Request,
+    kind: ImportKind = Path(description="Kind of imported records"),
+    file_format: ImportFormat | None = Query(default=None, alias="format", description="File format, taken from Content-Type header if not set"),
+):
+    """
+    Import CSV (with header) or NDJSON rows sent as the request body, one record per line,
+    quoted CSV values may contain line breaks.
+    hotels: title, location, stars, check_in, check_out and optional id to update the hotel.
+    rooms: hotel_id, room_type_id, number, title, description, price and optional id to update the room.
+    room_facilities: room_id, facility_id.
+    Valid rows are imported, invalid rows are reported with line numbers in errors.
+    """
+    file_format = file_format or import_format(request.headers.get("content-type"))
+    if file_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson body or set format parameter"
+        )
+    result = await import_records(db, kind, file_format, request.stream())
+    await db.commit()
+    logger.info(f"Imported {result.imported} {kind}, {result.failed} rows failed")
+    return result
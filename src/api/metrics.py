@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from src.utils.metrics import metrics_response_body
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics of all worker processes"""
+    body, content_type = metrics_response_body()
+    return Response(content=body, media_type=content_type)
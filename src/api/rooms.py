@@ -1,13 +1,15 @@
 from datetime import date
-from fastapi import APIRouter, HTTPException, Path, Query, Body
+from fastapi import APIRouter, HTTPException, Path, Query, Body, Request
 import logging
 
 from fastapi.openapi.models import Example
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
-from src.api.dependencies import DBDep
-from src.schemas.rooms import RoomCreateModel, RoomCreateRequest, RoomPartialDataRequest, RoomPartialDataModel
-from src.schemas.facilities import RoomsFacilitiesCreateRequest
+from src.api.dependencies import DBDep, DBManager
+from src.schemas.rooms import RoomCreateModel, RoomCreateRequest, RoomPartialDataRequest, RoomPartialDataModel, RoomsWithFacilities
+from src.utils.etag import etag_matches, make_etag, not_modified
+from src.utils.serialization import json_list_response
+from src.utils.streaming import stream_media_type, stream_response
 
 logger = logging.getLogger("uvicorn")
 
@@ -15,43 +17,48 @@ router = APIRouter(tags=["Rooms"])
 
 
 # Helpers functions
-async def check_room_facilities(db: DBDep, facilities: list[int]) -> list[int]:
-    """ Check if all facilities exist in DB and return list of good facilities """
-    facilities_db_list = [facility.id for facility in await db.facilities.get_all()]
-    return [facility_id for facility_id in facilities if facility_id in facilities_db_list]
-
-async def update_room_facilities(db: DBDep, room_id: int, facilities_list: list[int]):
-    """ Update facilities for room """
-    checked_new_facilities = await check_room_facilities(db, facilities_list)
-    if checked_new_facilities:
-        room_facilities_db = await db.rooms_facilities.get_all(room_id=room_id)
-        room_facilities_db_facility_ids = [facility.facility_id for facility in room_facilities_db]
-        # Compare existing facilities with new facilities list
-        _to_add_facilities = list(set(checked_new_facilities) - set(room_facilities_db_facility_ids))
-        _to_remove_facilities = list(set(room_facilities_db_facility_ids) - set(checked_new_facilities))
-        if _to_add_facilities:
-            await db.rooms_facilities.add_bulk([RoomsFacilitiesCreateRequest(room_id=room_id, facility_id=facility_id) for facility_id in _to_add_facilities])
-        if _to_remove_facilities:
-            _to_remove_facilities_ids = [facility.id for facility in room_facilities_db if facility.facility_id in _to_remove_facilities]
-            await db.rooms_facilities.delete_bulk(_to_remove_facilities_ids)
-        print(f"Facilities updated Added: {_to_add_facilities} Removed: {_to_remove_facilities}")
-
-@router.get("/rooms/available", summary="Get all available rooms")
+async def update_room_facilities(db: DBDep, room_id: int, facilities_list: list[int]) -> list[int] | None:
+    """
+    Update facilities for room. Returns added facility IDs, None if the facilities were not changed.
+    Facilities are part of the room data, the caller must change the room version (ETag) if they were.
+    """
+    added, removed = await db.rooms_facilities.sync(room_id, facilities_list)
+    if not added and not removed:
+        return None
+    logger.info(f"Room {room_id} facilities updated Added: {added} Removed: {removed}")
+    return added
+
+@router.get("/rooms/available", response_model=list[RoomsWithFacilities], summary="Get all available rooms")
 async def get_available_rooms(
         db: DBDep,
+        request: Request,
         check_in: date = Query(description="Check-in date", example="2025-07-01"),
         check_out: date = Query(description="Check-out date", example="2025-07-20")
     ):
-    """ Get all available rooms for given check-in and check-out dates """
+    """
+    Get all available rooms for given check-in and check-out dates.
+    Send Accept: application/x-ndjson or text/csv to stream rows instead of building one JSON array.
+    """
+    media_type = stream_media_type(request)
+    if media_type:
+        async def rooms_stream():
+            # Own session: the request session is closed before the response body is streamed
+            async with DBManager() as stream_db:
+                async for room in stream_db.rooms.stream_available_rooms(check_in, check_out):
+                    yield room
+        return stream_response(rooms_stream(), media_type)
+
     rooms = await db.rooms.get_available_rooms(check_in, check_out)
     if not rooms:
         raise HTTPException(status_code=404, detail=f"Rooms not found for check_in: {check_in} and check_out: {check_out}")
-    return rooms
+    return json_list_response(RoomsWithFacilities, rooms)
 
 
 @router.get("/hotels/{hotel_id}/rooms/{room_id}", summary="Get room by ID")
 async def get_room_by_id(
         db: DBDep,
+        request: Request,
+        response: Response,
         hotel_id: int = Path(description="ID of the hotel", gt=0, openapi_examples={
                 "Hotel ID=1": Example(
                     summary = "Hotel ID=1",
@@ -65,11 +72,16 @@ async def get_room_by_id(
                 ),
             })
     ):
-    """ Get room by ID """
+    """ Get room by ID, returns 304 if room has not changed since If-None-Match ETag """
     logger.info(f"Getting room by ID: {room_id}")
+    if request.headers.get("if-none-match"):
+        version = await db.rooms.get_version(id=room_id, hotel_id=hotel_id)
+        if version is not None and etag_matches(request, make_etag(room_id, version)):
+            return not_modified(make_etag(room_id, version))
     room = await db.rooms.get_one_or_none(id=room_id, hotel_id=hotel_id)
     if room is None:
         raise HTTPException(status_code=404, detail="Room not found")
+    response.headers["ETag"] = make_etag(room.id, room.version)
     return room
 
 
@@ -110,7 +122,10 @@ async def create_room(
     """ Create new room in the Hotel"""
     _room_data = RoomCreateModel(**room_data.model_dump(), hotel_id=hotel_id)
     room_added = await db.rooms.add(_room_data)
-    await update_room_facilities(db, room_added.id, room_data.facilities)
+    added = await update_room_facilities(db, room_added.id, room_data.facilities)
+    if added:
+        # New room has only the added facilities, no version change is needed as nobody has seen the room yet
+        room_added.facilities = [facility for facility in await db.facilities.get_all() if facility.id in added]
     await db.commit()
     return JSONResponse(status_code=200, content={"detail": "Room created", "data": room_added.model_dump()})
 
@@ -141,8 +156,9 @@ async def edit_room_full_data(
     ):
     """ Update room with full parameters list """
     _room_data = RoomCreateModel(**room_data.model_dump(), hotel_id=hotel_id)
-    room_edited = await db.rooms.edit(_room_data, id=room_id)
+    # Facilities first, so the room returned by edit has the new ones; edit changes the room version
     await update_room_facilities(db, room_id, room_data.facilities)
+    room_edited = await db.rooms.edit(_room_data, id=room_id)
     await db.commit()
     return JSONResponse(status_code=200, content={"detail": "Room updated", "data": room_edited.model_dump()})
 
@@ -165,10 +181,12 @@ async def update_room_partial_data(
     ):
     """ Partial Update room by ID and partial parameters list """
     _room_update_data = RoomPartialDataModel(**room_data.model_dump(exclude_unset=True))
-    print(_room_update_data)
+    # Facilities first, so the room returned by edit has the new ones
+    if room_data.facilities and await update_room_facilities(db, room_id, room_data.facilities) is not None:
+        if not _room_update_data.model_dump(exclude_unset=True):
+            # Edit without fields only reads the room, change the version here
+            await db.rooms.touch(id=room_id, hotel_id=hotel_id)
     room_edited = await db.rooms.edit(_room_update_data, id=room_id, hotel_id=hotel_id, partial_update=True)
-    if room_data.facilities:
-        await update_room_facilities(db, room_id, room_data.facilities)
     await db.commit()
     return JSONResponse(status_code=200, content={"detail": "Room updated", "data": room_edited.model_dump()})
 
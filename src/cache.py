@@ -0,0 +1,60 @@
+import logging
+
+from src.config import settings
+from src.utils.cache import CacheBackend, DateRangeCache, MemoryCacheBackend, RedisCacheBackend
+
+logger = logging.getLogger("uvicorn")
+
+
+def create_cache_backend() -> CacheBackend | None:
+    """
+    Create repositories cache backend from settings.
+    If auto picked redis but the redis package is not installed, falls back to memory cache with a warning.
+    """
+    match settings.cache_backend:
+        case "memory":
+            return MemoryCacheBackend(maxsize=settings.CACHE_MAX_ENTRIES)
+        case "redis":
+            try:
+                return RedisCacheBackend(settings.CACHE_REDIS_URL)
+            except RuntimeError as e:
+                if settings.CACHE_BACKEND != "auto":
+                    raise
+                logger.warning(f"{e}, using memory cache: other workers may serve stale data for up to CACHE_TTL")
+                return MemoryCacheBackend(maxsize=settings.CACHE_MAX_ENTRIES)
+        case _:
+            return None
+
+
+cache = create_cache_backend()
+
+# Availability search results, invalidated by bookings overlapping their date range
+availability_cache = DateRangeCache(maxsize=settings.AVAILABILITY_CACHE_SIZE, ttl=settings.AVAILABILITY_CACHE_TTL, name="availability")
+
+# Tables whose changes may alter any availability search result
+AVAILABILITY_TABLES = {"hotels", "rooms", "rooms_facilities"}
+
+
+async def invalidate_after_commit(session_info: dict) -> None:
+    """ Invalidate caches for changes recorded by repositories in the committed session """
+    cache_tags = session_info.pop("cache_tags", None)
+    if cache_tags and cache is not None:
+        try:
+            await cache.invalidate_tags(cache_tags)
+        except Exception as e:
+            # The transaction is committed already, cached entries of the tags expire after CACHE_TTL
+            logger.error(f"Cache invalidation of {len(cache_tags)} tags failed: {e!r}")
+
+    changed_tables = session_info.pop("changed_tables", set())
+    booked_ranges = session_info.pop("booked_ranges", [])
+    if changed_tables & AVAILABILITY_TABLES:
+        availability_cache.clear()
+    else:
+        for check_in, check_out in booked_ranges:
+            availability_cache.invalidate(check_in, check_out)
+
+
+def discard_pending_invalidations(session_info: dict) -> None:
+    """ Forget changes recorded in the rolled back session """
+    for key in ("cache_tags", "changed_tables", "booked_ranges"):
+        session_info.pop(key, None)
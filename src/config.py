@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -6,12 +7,69 @@ class Settings(BaseSettings):
     DB_PASSWORD : str
     DB_HOST : str
     DB_PORT : int
+
+    # Engine profile (see src/db.py ENGINE_PROFILES), options below override profile values
+    DB_PROFILE : Literal["dev", "prod", "bench"] = "dev"
+    DB_ECHO : bool | None = None
+    DB_POOL_SIZE : int | None = None
+    DB_MAX_OVERFLOW : int | None = None
+    DB_POOL_RECYCLE : int | None = None
+    DB_POOL_PRE_PING : bool | None = None
+    DB_STATEMENT_CACHE_SIZE : int | None = None
+    DB_STATEMENT_TIMEOUT_MS : int | None = None
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS : int | None = None
+    # PgBouncer (transaction pooling) compatible mode: no prepared statements cache
+    DB_PGBOUNCER : bool = False
     
+    # Read-through cache of catalogue repositories: memory (per process), redis (shared) or none.
+    # Invalidation happens after commit in the process that made the change, so with several workers
+    # a memory cache serves stale hotels, rooms and facilities in the other workers for up to CACHE_TTL.
+    # auto picks redis when WEB_CONCURRENCY > 1 (uvicorn and gunicorn take the number of workers from it,
+    # set it instead of --workers) and memory for a single worker, or if the redis package is not installed.
+    # An unreachable Redis server does not fail requests: reads fall back to the database, errors are logged
+    CACHE_BACKEND : Literal["auto", "memory", "redis", "none"] = "auto"
+    CACHE_TTL : int = 300
+    CACHE_MAX_ENTRIES : int = 10000
+    CACHE_REDIS_URL : str = "redis://localhost:6379/0"
+    # In-process cache of availability search results, 0 TTL disables it
+    AVAILABILITY_CACHE_TTL : int = 10
+    AVAILABILITY_CACHE_SIZE : int = 1024
+
+    # Number of worker processes, read by uvicorn/gunicorn too
+    WEB_CONCURRENCY : int = 1
+
     JWT_SECRET_KEY : str
     JWT_ALGORITHM : str
 
+    # Password hashing executor: bcrypt runs off the event loop in a bounded thread pool
+    AUTH_HASH_WORKERS : int = 4
+    AUTH_HASH_QUEUE_LIMIT : int = 32
+    # bcrypt cost: fixed rounds or calibrated at startup for target hashing time
+    AUTH_BCRYPT_ROUNDS : int | None = None
+    AUTH_BCRYPT_TARGET_MS : int = 250
+
+    # Caches of verified tokens (until token expiration) and users for /auth/is_auth
+    AUTH_TOKEN_CACHE_SIZE : int = 10000
+    AUTH_USER_CACHE_SIZE : int = 10000
+    AUTH_USER_CACHE_TTL : int = 30
+
+    # Per-request SQL instrumentation (src/utils/timing.py): statements slower than SLOW_QUERY_MS
+    # are logged with parameters (0 disables), Server-Timing header and one log line per request
+    SLOW_QUERY_MS : int = 200
+    SERVER_TIMING : bool = True
+    REQUEST_LOG : bool = True
+    # Log requests issuing more statements than their route budget (src/utils/query_budget.py)
+    QUERY_BUDGET_CHECK : bool = False
+
     model_config = SettingsConfigDict(env_file=".env")
 
+    @property
+    def cache_backend(self) -> str:
+        """ CACHE_BACKEND with auto resolved by the number of workers """
+        if self.CACHE_BACKEND == "auto":
+            return "redis" if self.WEB_CONCURRENCY > 1 else "memory"
+        return self.CACHE_BACKEND
+
     @property
     def DB_URL(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
@@ -1,10 +1,91 @@
+from uuid import uuid4
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
-from src.config import settings
+from src.config import Settings, settings
+from src.utils.metrics import TimedQueuePool
 
-engine = create_async_engine(settings.DB_URL, echo=True)
+# Engine profiles, values can be overridden one by one with DB_* settings
+ENGINE_PROFILES = {
+    "dev": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "statement_cache_size": 100,
+        "statement_timeout_ms": 0,
+        "idle_in_transaction_timeout_ms": 0,
+    },
+    "prod": {
+        "echo": False,
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_cache_size": 500,
+        "statement_timeout_ms": 5000,
+        "idle_in_transaction_timeout_ms": 10000,
+    },
+    "bench": {
+        "echo": False,
+        "pool_size": 50,
+        "max_overflow": 0,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "statement_cache_size": 1000,
+        "statement_timeout_ms": 30000,
+        "idle_in_transaction_timeout_ms": 30000,
+    },
+}
+
+
+def engine_options(settings: Settings) -> dict:
+    """ Build create_async_engine arguments from the engine profile and DB_* overrides """
+    profile = dict(ENGINE_PROFILES[settings.DB_PROFILE])
+    overrides = {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "statement_timeout_ms": settings.DB_STATEMENT_TIMEOUT_MS,
+        "idle_in_transaction_timeout_ms": settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS,
+    }
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+
+    if settings.DB_PGBOUNCER:
+        # Prepared statements don't survive PgBouncer transaction pooling, and it rejects
+        # unknown startup parameters, so timeouts have to be set with ALTER ROLE ... SET
+        connect_args = {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    else:
+        connect_args = {
+            # SQLAlchemy dialect cache of prepared statements per connection
+            "prepared_statement_cache_size": profile["statement_cache_size"],
+            "server_settings": {
+                "statement_timeout": str(profile["statement_timeout_ms"]),
+                "idle_in_transaction_session_timeout": str(profile["idle_in_transaction_timeout_ms"]),
+            },
+        }
+
+    return {
+        "poolclass": TimedQueuePool,
+        "echo": profile["echo"],
+        "pool_size": profile["pool_size"],
+        "max_overflow": profile["max_overflow"],
+        "pool_recycle": profile["pool_recycle"],
+        "pool_pre_ping": profile["pool_pre_ping"],
+        "connect_args": connect_args,
+    }
+
+
+engine = create_async_engine(settings.DB_URL, **engine_options(settings))
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 class Base(DeclarativeBase):
-    pass
\ No newline at end of file
+    pass
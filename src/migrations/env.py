@@ -10,7 +10,7 @@ from src.db import Base
 from src.models.hotels import HotelsORM
 from src.models.rooms import RoomsORM, RoomTypesORM
 from src.models.users import UsersORM
-from src.models.bookings import BookingsORM
+from src.models.bookings import BookingsORM, RoomNightsORM
 from src.models.facilities import FacilitiesORM, RoomsFacilitiesORM
 
 # this is the Alembic Config object, which provides
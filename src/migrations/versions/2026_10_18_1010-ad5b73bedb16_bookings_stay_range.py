@@ -0,0 +1,85 @@
+"""bookings stay range
+
+Revision ID: ad5b73bedb16
+Revises: e8046cbbb67b
+Create Date: 2026-10-18 10:10:42.118305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ad5b73bedb16"
+down_revision: Union[str, None] = "e8046cbbb67b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # btree_gist provides the "=" operator class for room_id inside a GiST index
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column(
+        "bookings",
+        sa.Column(
+            "stay",
+            postgresql.DATERANGE(),
+            sa.Computed(
+                "daterange(check_in::date, check_out::date, '[)')", persisted=True
+            ),
+            nullable=False,
+        ),
+    )
+    # Overlapping bookings of a room would fail the constraint: keep the earliest booking (lowest id)
+    # and delete later ones overlapping a kept booking, repeated so chains of overlaps are resolved
+    # the same way on every database. Removed bookings are reported as notices.
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            removed_count integer;
+            removed_ids text;
+        BEGIN
+            LOOP
+                WITH removed AS (
+                    DELETE FROM bookings later
+                    USING bookings earlier
+                    WHERE later.room_id = earlier.room_id
+                      AND later.id > earlier.id
+                      AND later.stay && earlier.stay
+                      AND NOT EXISTS (
+                          SELECT 1 FROM bookings first
+                          WHERE first.room_id = earlier.room_id
+                            AND first.id < earlier.id
+                            AND first.stay && earlier.stay
+                      )
+                    RETURNING later.id, later.room_id
+                )
+                SELECT count(*), string_agg(format('%s (room %s)', id, room_id), ', ' ORDER BY id)
+                INTO removed_count, removed_ids
+                FROM removed;
+                EXIT WHEN removed_count = 0;
+                RAISE NOTICE 'Deleted % overlapping bookings: %', removed_count, removed_ids;
+            END LOOP;
+        END $$
+        """
+    )
+    # The constraint's GiST index also serves the "room_id = ? AND stay && ?" lookups
+    op.create_exclude_constraint(
+        "bookings_room_id_stay_excl",
+        "bookings",
+        ("room_id", "="),
+        ("stay", "&&"),
+        using="gist",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("bookings_room_id_stay_excl", "bookings")
+    op.drop_column("bookings", "stay")
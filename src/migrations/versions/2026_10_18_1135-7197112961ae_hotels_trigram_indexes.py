@@ -0,0 +1,46 @@
+"""hotels trigram indexes
+
+Revision ID: 7197112961ae
+Revises: ad5b73bedb16
+Create Date: 2026-10-18 11:35:07.524881
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7197112961ae"
+down_revision: Union[str, None] = "ad5b73bedb16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_hotels_title_trgm",
+        "hotels",
+        ["title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_hotels_location_trgm",
+        "hotels",
+        ["location"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"location": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_hotels_location_trgm", table_name="hotels")
+    op.drop_index("ix_hotels_title_trgm", table_name="hotels")
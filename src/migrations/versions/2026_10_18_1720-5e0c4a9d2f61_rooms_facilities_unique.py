@@ -0,0 +1,45 @@
+"""rooms facilities unique
+
+Revision ID: 5e0c4a9d2f61
+Revises: b2cad06ef291
+Create Date: 2026-10-18 17:20:12.512903
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e0c4a9d2f61"
+down_revision: Union[str, None] = "b2cad06ef291"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the first link of duplicated room facilities, the constraint can't be created otherwise
+    op.execute(
+        """
+        DELETE FROM rooms_facilities duplicate
+        USING rooms_facilities original
+        WHERE duplicate.room_id = original.room_id
+          AND duplicate.facility_id = original.facility_id
+          AND duplicate.id > original.id
+        """
+    )
+    op.create_unique_constraint(
+        "rooms_facilities_room_id_facility_id_key",
+        "rooms_facilities",
+        ["room_id", "facility_id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        "rooms_facilities_room_id_facility_id_key", "rooms_facilities", type_="unique"
+    )
@@ -0,0 +1,50 @@
+"""room nights
+
+Revision ID: c81f0b5d7a23
+Revises: 5e0c4a9d2f61
+Create Date: 2026-10-18 19:05:37.204518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c81f0b5d7a23"
+down_revision: Union[str, None] = "5e0c4a9d2f61"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "room_nights",
+        sa.Column("room_id", sa.Integer(), nullable=False),
+        sa.Column("night", sa.Date(), nullable=False),
+        sa.Column("booking_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["booking_id"], ["bookings.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["room_id"], ["rooms.id"]),
+        sa.PrimaryKeyConstraint("room_id", "night"),
+    )
+    op.create_index(
+        op.f("ix_room_nights_booking_id"), "room_nights", ["booking_id"], unique=False
+    )
+    # Nights of existing bookings, they never overlap thanks to bookings_room_id_stay_excl
+    op.execute(
+        """
+        INSERT INTO room_nights (room_id, night, booking_id)
+        SELECT room_id, generate_series(check_in::date, check_out::date - 1, interval '1 day')::date, id
+        FROM bookings
+        """
+    )
+    op.execute("ANALYZE room_nights")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_room_nights_booking_id"), table_name="room_nights")
+    op.drop_table("room_nights")
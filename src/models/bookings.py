@@ -1,8 +1,9 @@
 """
 SQLAlchemy models for Bookings
 """
-from datetime import datetime
-from sqlalchemy import DateTime, Float, ForeignKey, String, Integer
+from datetime import date, datetime
+from sqlalchemy import Computed, Date, DateTime, Float, ForeignKey, String, Integer
+from sqlalchemy.dialects.postgresql import DATERANGE, ExcludeConstraint, Range
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db import Base
@@ -10,11 +11,38 @@ from src.db import Base
 class BookingsORM(Base):
     __tablename__ = "bookings"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     room_id: Mapped[int] = mapped_column(Integer, ForeignKey("rooms.id"), nullable=False)
     check_in: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     check_out: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     total_price: Mapped[float] = mapped_column(Float, nullable=False)
+    # Nights occupied by the booking: [check_in date, check_out date)
+    stay: Mapped[Range[date]] = mapped_column(
+        DATERANGE,
+        Computed("daterange(check_in::date, check_out::date, '[)')", persisted=True),
+    )
 
     user = relationship("UsersORM", back_populates="bookings")
-    rooms = relationship("RoomsORM", back_populates="bookings")
\ No newline at end of file
+    rooms = relationship("RoomsORM", back_populates="bookings")
+
+    __table_args__ = (
+        # One room can't be booked twice for the same night (needs btree_gist),
+        # kept as a backstop for bookings written without room_nights (COPY, manual fixes)
+        ExcludeConstraint(
+            ("room_id", "="),
+            ("stay", "&&"),
+            name="bookings_room_id_stay_excl",
+            using="gist",
+        ),
+    )
+
+
+class RoomNightsORM(Base):
+    """
+    Room-night inventory: one row per booked night of a room, written in the same statement as the booking.
+    The primary key rejects double booking of a night, availability is an anti-join on it.
+    """
+    __tablename__ = "room_nights"
+    room_id: Mapped[int] = mapped_column(Integer, ForeignKey("rooms.id"), primary_key=True)
+    night: Mapped[date] = mapped_column(Date, primary_key=True)
+    booking_id: Mapped[int] = mapped_column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -3,7 +3,7 @@ Hotels rooms facilities model
 """
 
 from typing import Optional
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db import Base
@@ -14,6 +14,8 @@ class FacilitiesORM(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String(100), nullable=False)
     description: Mapped[Optional[str | None]] = mapped_column(String(255), nullable=True)
+    # Incremented on every update, used for ETags
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
 
     rooms: Mapped[list["RoomsORM"]] = relationship(
         "RoomsORM",
@@ -30,4 +32,9 @@ class RoomsFacilitiesORM(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     room_id: Mapped[int] = mapped_column(Integer, ForeignKey("rooms.id"))
     facility_id: Mapped[int] = mapped_column(Integer, ForeignKey("facilities.id"))
+
+    __table_args__ = (
+        # Target of ON CONFLICT DO NOTHING in facilities sync and import
+        UniqueConstraint("room_id", "facility_id", name="rooms_facilities_room_id_facility_id_key"),
+    )
     
\ No newline at end of file
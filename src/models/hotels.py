@@ -2,7 +2,7 @@
 SQLAlchemy models for Hotels
 """
 from datetime import time
-from sqlalchemy import String, Integer, Time
+from sqlalchemy import Index, String, Integer, Time
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db import Base
@@ -15,5 +15,13 @@ class HotelsORM(Base):
     location: Mapped[str] = mapped_column(String(200))
     check_in: Mapped[time] = mapped_column(Time, nullable=True, default=time(14, 0))
     check_out: Mapped[time] = mapped_column(Time, nullable=True, default=time(12, 0))
+    # Incremented on every update, used for ETags
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
 
-    rooms = relationship("RoomsORM", back_populates="hotel")
\ No newline at end of file
+    rooms = relationship("RoomsORM", back_populates="hotel")
+
+    __table_args__ = (
+        # Trigram indexes for ILIKE '%...%' and similarity search (needs pg_trgm)
+        Index("ix_hotels_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_hotels_location_trgm", "location", postgresql_using="gin", postgresql_ops={"location": "gin_trgm_ops"}),
+    )
\ No newline at end of file
@@ -11,12 +11,14 @@ from src.db import Base
 class RoomsORM(Base):
     __tablename__ = "rooms"
     id: Mapped[int] = mapped_column(primary_key=True)
-    hotel_id: Mapped[int] = mapped_column(ForeignKey("hotels.id"))
+    hotel_id: Mapped[int] = mapped_column(ForeignKey("hotels.id"), index=True)
     room_type_id: Mapped[int] = mapped_column(ForeignKey("room_types.id"))
     number: Mapped[str] = mapped_column(String(10))
     title: Mapped[str] = mapped_column(String(100))
     description: Mapped[Optional[str | None]]
     price: Mapped[int]
+    # Incremented on every update of the room or its facilities, used for ETags
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
     
     hotel = relationship("HotelsORM", back_populates="rooms")
     room_type = relationship("RoomTypesORM", back_populates="rooms")
@@ -1,24 +1,126 @@
+import inspect
+from typing import Iterable
 from fastapi import HTTPException
-from sqlalchemy import delete, select, insert, update
+from sqlalchemy import ColumnElement, Integer, Table, any_, bindparam, delete, exists, func, select, insert, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel
 
+from src.cache import cache
+from src.utils.metrics import count_calls
+from src.utils.serialization import list_adapter
+
 
 class BaseRepository:
     model = None
     schema: BaseModel = None
+    # Seconds to cache get_all/get_one_or_none results, None disables caching for repository
+    cache_ttl: int | None = None
 
     def __init__(self, session):
         self.session = session
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Count calls of public methods labelled by repository class, calls of super() methods are not counted twice
+        for name in dir(cls):
+            # Wrapper of the parent repository class is replaced, not wrapped again
+            method = getattr(cls, name)
+            method = getattr(method, "__counted__", method)
+            if name.startswith("_") or not (inspect.iscoroutinefunction(method) or inspect.isasyncgenfunction(method)):
+                continue
+            setattr(cls, name, count_calls(cls.__name__, name, method))
+
+    async def _cached(self, tags: list[str], loader, **key_params):
+        """ Read-through cache: key is built from repository class, method and filters """
+        if not self.cache_ttl or cache is None:
+            return await loader()
+        key = f"{self.__class__.__name__}:{sorted(key_params.items())!r}"
+        return await cache.get_or_load(key, tags, self.cache_ttl, loader)
+
+    def _invalidate_cache(self, ids: Iterable[int] = ()):
+        """
+        Record changed table and cache tags of changed records: "<table>" for lists and "<table>:<id>" for single records.
+        Caches are invalidated by DBManager after commit.
+        """
+        table = self.model.__tablename__
+        self.session.info.setdefault("changed_tables", set()).add(table)
+        if self.cache_ttl:
+            tags = self.session.info.setdefault("cache_tags", set())
+            tags.add(table)
+            tags.update(f"{table}:{id}" for id in ids)
     
     # Repository Template for getting all records from database
-    async def get_all(self, *args, **kwargs):
-        query = select(self.model)
+    async def get_all(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+        order_by: str | None = None,
+        columns: list[str] | None = None,
+        **filter_by
+    ):
+        """
+        Get records matching filters.
+        after_id enables keyset pagination by ID (ordered by "id" or "-id"), order_by is a column name ("-column" for descending).
+        If columns are given only these columns are selected and plain dicts are returned instead of schemas.
+        """
+        return await self._cached(
+            [self.model.__tablename__],
+            lambda: self._get_all(limit, offset, after_id, order_by, columns, **filter_by),
+            method="get_all", limit=limit, offset=offset, after_id=after_id, order_by=order_by, columns=columns, **filter_by
+        )
+
+    async def _get_all(self, limit, offset, after_id, order_by, columns, **filter_by):
+        if columns:
+            query = select(*[self._column(column) for column in columns])
+        else:
+            query = select(self.model)
+        query = query.filter_by(**filter_by)
+        if after_id is not None:
+            # Keyset pagination continues after the last ID of the previous page in the page order
+            order_by = order_by or "id"
+            if order_by not in ("id", "-id"):
+                raise ValueError(f"after_id needs order by id or -id, not {order_by}")
+            query = query.where(self.model.id < after_id if order_by == "-id" else self.model.id > after_id)
+        if order_by:
+            column = self._column(order_by.removeprefix("-"))
+            query = query.order_by(column.desc() if order_by.startswith("-") else column)
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
         result = await self.session.execute(query)
-        return [self.schema.model_validate(res, from_attributes=True) for res in result.scalars().all()]
+        if columns:
+            return [dict(row) for row in result.mappings().all()]
+        return self._validate_all(result.scalars().all())
+
+    def _validate_all(self, rows) -> list:
+        """ Validate ORM rows as list of schemas in one pydantic-core call instead of model_validate per row """
+        return list_adapter(self.schema).validate_python(rows, from_attributes=True)
+
+    # Repository Template for streaming records from database
+    async def stream_all(self, yield_per: int = 1000, **filter_by):
+        """ Iterate over records matching filters with server-side cursor, fetching yield_per rows at a time """
+        query = select(self.model).filter_by(**filter_by).execution_options(yield_per=yield_per)
+        result = await self.session.stream_scalars(query)
+        async for res in result:
+            yield self.schema.model_validate(res, from_attributes=True)
+
+    def _column(self, name: str):
+        """ Get model column by name """
+        column = self.model.__table__.columns.get(name)
+        if column is None:
+            raise ValueError(f"{self.model.__name__} has no column {name}")
+        return getattr(self.model, column.key)
  
     # Repository Template for getting one record from database
     async def get_one_or_none(self, **filter_by):
+        table = self.model.__tablename__
+        tags = [f"{table}:{filter_by['id']}"] if "id" in filter_by else [table]
+        return await self._cached(tags, lambda: self._get_one_or_none(**filter_by), method="get_one_or_none", **filter_by)
+
+    async def _get_one_or_none(self, **filter_by):
         query = select(self.model).filter_by(**filter_by)
         result = await self.session.execute(query)
         res = result.scalars().one_or_none()
@@ -29,9 +131,10 @@ class BaseRepository:
     # Repository Template for adding new record to database
     async def add(self, data: BaseModel):
         try:
-            add_stmt = insert(self.model).values(**data.model_dump()).returning(self.model)
+            add_stmt = insert(self.model).values(**data.model_dump()).returning(self.model).options(*self._load_options())
             result = await self.session.execute(add_stmt)
             res = result.scalars().one()
+            self._invalidate_cache([res.id])
             return self.schema.model_validate(res, from_attributes=True)
         except IntegrityError as e:
             raise e
@@ -41,42 +144,145 @@ class BaseRepository:
         try:
             add_stmt = insert(self.model).values([item.model_dump() for item in data])
             await self.session.execute(add_stmt)
+            self._invalidate_cache()
         except IntegrityError as e:
             raise e
 
+    # Repository Template for merging bulk import staging table into the table
+    async def merge_staged(self, staging: Table) -> tuple[list[int], list[tuple[int, str]]]:
+        """
+        Validate and merge rows of bulk import staging table (see src.services.bulk_import) with set-based statements.
+        Rows failing _staging_checks are deleted from staging and reported as (line, error).
+        Rows with ID update the record or are inserted with this ID, rows without ID get new IDs.
+        Returns IDs of merged records and errors.
+        """
+        errors = await self._delete_invalid_staged(staging)
+        columns = [column.name for column in staging.columns if column.name not in ("line", "id")]
+
+        upsert_stmt = pg_insert(self.model).from_select(
+            ["id", *columns],
+            select(staging.c.id, *[staging.c[column] for column in columns]).where(staging.c.id.is_not(None))
+        )
+        values_to_update = {column: upsert_stmt.excluded[column] for column in columns}
+        if self._versioned():
+            values_to_update["version"] = self.model.version + 1
+        upsert_stmt = upsert_stmt.on_conflict_do_update(index_elements=["id"], set_=values_to_update)
+        merged_ids = (await self.session.execute(upsert_stmt.returning(self.model.id))).scalars().all()
+        if merged_ids:
+            # Explicit IDs don't advance the sequence, move it past them
+            table = self.model.__tablename__
+            await self.session.execute(select(func.setval(
+                func.pg_get_serial_sequence(table, "id"),
+                select(func.max(self.model.id)).scalar_subquery()
+            )))
+
+        insert_stmt = insert(self.model).from_select(
+            columns,
+            select(*[staging.c[column] for column in columns]).where(staging.c.id.is_(None))
+        )
+        merged_ids += (await self.session.execute(insert_stmt.returning(self.model.id))).scalars().all()
+        self._invalidate_cache(merged_ids)
+        return merged_ids, errors
+
+    async def _delete_invalid_staged(self, staging: Table) -> list[tuple[int, str]]:
+        """ Delete staging rows failing checks, one DELETE ... RETURNING per check """
+        errors = []
+        for error, condition in self._staging_checks(staging):
+            result = await self.session.execute(delete(staging).where(condition).returning(staging.c.line))
+            errors.extend((line, error) for line in result.scalars().all())
+        return errors
+
+    def _staging_checks(self, staging: Table) -> list[tuple[str, ColumnElement]]:
+        """ (error, condition of invalid rows) pairs for staging rows, by default IDs must be unique in the file """
+        if "id" not in staging.columns:
+            return []
+        earlier = staging.alias("earlier")
+        return [(
+            "Duplicate ID in the file",
+            staging.c.id.is_not(None) & exists().where(earlier.c.id == staging.c.id, earlier.c.line < staging.c.line)
+        )]
+
     # Repository Template for editing record in database
     async def edit(self, data: BaseModel, partial_update: bool = False, **filter_by):
-        # If record exists, update it and the only one
-        query = select(self.model).filter_by(**filter_by)
+        """
+        Update the only record matching filters with single UPDATE ... RETURNING.
+        If several records were updated the error is raised and the caller's transaction must not be committed.
+        """
+        data_to_update = data.model_dump(exclude_unset=partial_update)
+        if data_to_update:
+            if self._versioned():
+                data_to_update["version"] = self.model.version + 1
+            query = (
+                update(self.model).values(**data_to_update).filter_by(**filter_by)
+                .returning(self.model).options(*self._load_options())
+            )
+        else:
+            # Nothing to update, just return the record
+            query = select(self.model).options(*self._load_options()).filter_by(**filter_by)
         result = await self.session.execute(query)
-        len_result = len(result.scalars().all())
-        match len_result:
+        updated = result.scalars().all()
+        if data_to_update:
+            self._invalidate_cache([res.id for res in updated])
+        match len(updated):
             case 0:
                 raise HTTPException(status_code=404, detail="Record not found")
             case 1:
-                data_to_update = data.model_dump(exclude_unset=partial_update)
-                print(data_to_update)
-                if data_to_update:
-                    update_stmt = update(self.model).values(**data_to_update).filter_by(**filter_by).returning(self.model)
-                    result = await self.session.execute(update_stmt)
-                    res = result.scalars().one()
-                    return self.schema.model_validate(res, from_attributes=True)
-                else:
-                    return await self.get_one_or_none(**filter_by)
+                return self.schema.model_validate(updated[0], from_attributes=True)
             case _:
                 raise HTTPException(status_code=400, detail="Multiple records found")
 
+    def _load_options(self) -> list:
+        """ Loader options of records returned by add and edit, e.g. relationships the schema includes """
+        return []
+
+    def _versioned(self) -> bool:
+        return "version" in self.model.__table__.columns
+
+    # Repository Template for getting record version only, for conditional requests
+    async def get_version(self, **filter_by) -> int | None:
+        query = select(self.model.version).filter_by(**filter_by)
+        result = await self.session.execute(query)
+        return result.scalars().one_or_none()
+
+    # Repository Template for getting version of all records, see src.utils.etag.collection_version
+    async def get_collection_version(self) -> tuple[int, int, int]:
+        query = select(
+            func.count(),
+            func.coalesce(func.sum(self.model.version), 0),
+            func.coalesce(func.max(self.model.id), 0)
+        )
+        result = await self.session.execute(query)
+        return tuple(result.one())
+
+    # Repository Template for incrementing version of records changed outside of the table (e.g. room facilities)
+    async def touch(self, **filter_by) -> None:
+        update_stmt = update(self.model).values(version=self.model.version + 1).filter_by(**filter_by).returning(self.model.id)
+        result = await self.session.execute(update_stmt)
+        self._invalidate_cache(result.scalars().all())
+
+    # Repository Template for incrementing version of bulk records by list of IDs
+    async def touch_bulk(self, data: list[int]) -> None:
+        # IDs are sent as one array parameter, IN list of bind parameters is limited to 32767 items
+        ids = bindparam("ids", data, type_=ARRAY(Integer))
+        update_stmt = update(self.model).values(version=self.model.version + 1).filter(self.model.id == any_(ids))
+        await self.session.execute(update_stmt)
+        self._invalidate_cache(data)
+
     # Repository Template for deleting record from database
     async def delete(self, **filter_by) -> None:
-        query = select(self.model).filter_by(**filter_by)
-        result = await self.session.execute(query)
-        len_result = len(result.scalars().all())
-        match len_result:
+        """
+        Delete the only record matching filters with single DELETE ... RETURNING.
+        If several records were deleted the error is raised and the caller's transaction must not be committed.
+        """
+        delete_stmt = delete(self.model).filter_by(**filter_by).returning(self.model.id)
+        result = await self.session.execute(delete_stmt)
+        deleted_ids = result.scalars().all()
+        self._invalidate_cache(deleted_ids)
+        match len(deleted_ids):
             case 0:
                 raise HTTPException(status_code=404, detail="Record not found")
             case 1:
-                delete_stmt = delete(self.model).filter_by(**filter_by)
-                await self.session.execute(delete_stmt)
+                return
             case _:
                 raise HTTPException(status_code=400, detail="Multiple records found")
 
@@ -85,4 +291,5 @@ class BaseRepository:
         """ Delete bulk records from database by list of IDs """
         delete_stmt = delete(self.model).filter(self.model.id.in_(data))
         await self.session.execute(delete_stmt)
+        self._invalidate_cache(data)
             
\ No newline at end of file
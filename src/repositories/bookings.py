@@ -1,10 +1,274 @@
 """
 Bookings Repository
 """
+from datetime import date, datetime, time
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import Date, Integer, column, delete, func, insert, literal, select, text, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
 from src.repositories.base import BaseRepository
-from src.models.bookings import BookingsORM
-from src.schemas.bookings import Booking
+from src.models.bookings import BookingsORM, RoomNightsORM
+from src.models.hotels import HotelsORM
+from src.models.rooms import RoomsORM
+from src.repositories.utils import booking_nights, room_is_booked
+from src.schemas.bookings import Booking, BookingBatchError, BookingCreateRequest, RoomNight
+
+# SQLSTATEs of double booking: room_nights primary key and bookings_room_id_stay_excl exclusion constraint
+UNIQUE_VIOLATION = "23505"
+EXCLUSION_VIOLATION = "23P01"
+
+# Hotel check-in/check-out times if not set for the hotel
+DEFAULT_CHECK_IN = time(14, 0)
+DEFAULT_CHECK_OUT = time(12, 0)
+
+
+def raise_if_already_booked(e: IntegrityError, detail: str):
+    """ Convert room night primary key or exclusion constraint violation to 409 Conflict """
+    if getattr(e.orig, "sqlstate", None) in (UNIQUE_VIOLATION, EXCLUSION_VIOLATION):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
 
 class BookingsRepository(BaseRepository):
     model = BookingsORM
     schema = Booking
+
+    async def add(self, data: BaseModel):
+        booking = await super().add(data)
+        nights = booking_nights(self.model.__table__).where(self.model.id == booking.id)
+        try:
+            await self.session.execute(
+                insert(RoomNightsORM).from_select(["room_id", "night", "booking_id"], nights)
+            )
+        except IntegrityError as e:
+            raise_if_already_booked(e, f"Room {booking.room_id} is already booked for these dates")
+            raise e
+        self._record_booked_range(booking)
+        return booking
+
+    def _with_nights(self, add_stmt, skip_booked_nights: bool = False):
+        """
+        Statement inserting bookings of add_stmt and their room_nights rows: the nights INSERT reads
+        RETURNING of the bookings INSERT in a CTE. Selects inserted bookings as ORM objects.
+        With skip_booked_nights nights already in room_nights are skipped instead of failing the statement,
+        every booking is selected with the number of its inserted nights to find incomplete ones.
+        """
+        bookings_cte = add_stmt.returning(*self.model.__table__.columns).cte("new_bookings")
+        nights_insert = pg_insert(RoomNightsORM).from_select(
+            ["room_id", "night", "booking_id"], booking_nights(bookings_cte)
+        )
+        if not skip_booked_nights:
+            # The nights CTE is not referenced by the query, add_cte renders it anyway
+            return select(aliased(self.model, bookings_cte)).add_cte(nights_insert.cte("new_nights"))
+        nights_cte = nights_insert.on_conflict_do_nothing().returning(RoomNightsORM.booking_id).cte("new_nights")
+        inserted_nights = (
+            select(func.count())
+            .select_from(nights_cte)
+            .where(nights_cte.c.booking_id == bookings_cte.c.id)
+            .scalar_subquery()
+        )
+        return select(aliased(self.model, bookings_cte), inserted_nights)
+
+    async def add_for_room(self, user_id: int, room_id: int, check_in: date, check_out: date) -> Booking | None:
+        """
+        Book the room in one statement: INSERT ... SELECT from the room joined with its hotel
+        takes the price and check-in/check-out times, booked nights are inserted to room_nights
+        by the same statement. Overlapping bookings are rejected atomically by room_nights primary key
+        (or the exclusion constraint) with 409. Returns None if the room does not exist.
+        """
+        nights = (check_out - check_in).days
+        booking_select = (
+            select(
+                literal(user_id),
+                RoomsORM.id,
+                literal(check_in) + func.coalesce(HotelsORM.check_in, DEFAULT_CHECK_IN),
+                literal(check_out) + func.coalesce(HotelsORM.check_out, DEFAULT_CHECK_OUT),
+                RoomsORM.price * nights,
+            )
+            .join(HotelsORM, RoomsORM.hotel_id == HotelsORM.id)
+            .where(RoomsORM.id == room_id)
+        )
+        add_stmt = insert(self.model).from_select(
+            ["user_id", "room_id", "check_in", "check_out", "total_price"], booking_select
+        )
+        try:
+            result = await self.session.execute(self._with_nights(add_stmt))
+        except IntegrityError as e:
+            raise_if_already_booked(e, f"Room {room_id} is already booked for these dates")
+            raise e
+        res = result.scalars().one_or_none()
+        if res is None:
+            return None
+        booking = self.schema.model_validate(res, from_attributes=True)
+        self._invalidate_cache([booking.id])
+        self._record_booked_range(booking)
+        return booking
+
+    async def add_batch(
+        self,
+        user_id: int,
+        items: list[tuple[int, BookingCreateRequest]],
+        best_effort: bool = False
+    ) -> tuple[list[Booking], list[BookingBatchError]]:
+        """
+        Book several rooms: one query for rooms with hotels, one set-based query for overlaps
+        with existing bookings and one multi-row INSERT ... RETURNING with room nights.
+        items are (index in request, booking) pairs. In all-or-nothing mode nothing is inserted
+        if any item fails; in best-effort mode failed items are skipped.
+        Returns created bookings and errors of items which were not booked.
+        """
+        errors = []
+
+        # Rooms with their hotels check-in/check-out times
+        rooms_query = (
+            select(RoomsORM.id, RoomsORM.price, HotelsORM.check_in, HotelsORM.check_out)
+            .join(HotelsORM, RoomsORM.hotel_id == HotelsORM.id)
+            .where(RoomsORM.id.in_({item.room_id for _, item in items}))
+        )
+        rooms = {room.id: room for room in (await self.session.execute(rooms_query)).all()}
+        for index, item in items:
+            if item.room_id not in rooms:
+                errors.append(BookingBatchError(index=index, detail=f"Room with ID {item.room_id} not found"))
+        items = [(index, item) for index, item in items if item.room_id in rooms]
+
+        # Overlaps with existing bookings for all items at once
+        if items:
+            items_values = values(
+                column("index", Integer),
+                column("room_id", Integer),
+                column("check_in", Date),
+                column("check_out", Date),
+                name="items"
+            ).data([(index, item.room_id, item.check_in, item.check_out) for index, item in items])
+            conflicts_query = select(items_values.c.index).where(
+                room_is_booked(items_values.c.room_id, items_values.c.check_in, items_values.c.check_out)
+            )
+            conflicts = set((await self.session.execute(conflicts_query)).scalars().all())
+            for index, item in items:
+                if index in conflicts:
+                    errors.append(BookingBatchError(index=index, detail=f"Room {item.room_id} is already booked for these dates"))
+            items = [(index, item) for index, item in items if index not in conflicts]
+
+        # Overlaps between items of the batch
+        accepted = []
+        for index, item in sorted(items, key=lambda pair: (pair[1].room_id, pair[1].check_in)):
+            if accepted and accepted[-1][1].room_id == item.room_id and item.check_in < accepted[-1][1].check_out:
+                errors.append(BookingBatchError(index=index, detail=f"Overlaps with item {accepted[-1][0]} of the batch"))
+            else:
+                accepted.append((index, item))
+
+        errors.sort(key=lambda error: error.index)
+        if not accepted or (errors and not best_effort):
+            return [], errors
+
+        bookings_data = []
+        for _, item in accepted:
+            room = rooms[item.room_id]
+            bookings_data.append({
+                "user_id": user_id,
+                "room_id": item.room_id,
+                "check_in": datetime.combine(item.check_in, room.check_in or DEFAULT_CHECK_IN),
+                "check_out": datetime.combine(item.check_out, room.check_out or DEFAULT_CHECK_OUT),
+                "total_price": (item.check_out - item.check_in).days * room.price,
+            })
+        add_stmt = pg_insert(self.model).values(bookings_data)
+        if best_effort:
+            # Bookings made concurrently since the overlaps check are skipped instead of failing the batch:
+            # by the exclusion constraint, or by room_nights primary key after the booking row is inserted
+            add_stmt = add_stmt.on_conflict_do_nothing()
+        try:
+            result = await self.session.execute(self._with_nights(add_stmt, skip_booked_nights=best_effort))
+        except IntegrityError as e:
+            raise_if_already_booked(e, "Some rooms were booked for these dates concurrently")
+            raise e
+        if best_effort:
+            rows = result.all()
+            incomplete = [
+                booking.id for booking, inserted_nights in rows
+                if inserted_nights < (booking.check_out.date() - booking.check_in.date()).days
+            ]
+            if incomplete:
+                # Their inserted nights are deleted by the room_nights foreign key cascade
+                await self.session.execute(delete(self.model).where(self.model.id.in_(incomplete)))
+            rows = [booking for booking, _ in rows if booking.id not in incomplete]
+        else:
+            rows = result.scalars().all()
+        created = {
+            (booking.room_id, booking.check_in.date()): booking
+            for booking in self._validate_all(rows)
+        }
+
+        bookings = []
+        for index, item in accepted:
+            booking = created.get((item.room_id, item.check_in))
+            if booking is None:
+                errors.append(BookingBatchError(index=index, detail=f"Room {item.room_id} is already booked for these dates"))
+            else:
+                bookings.append(booking)
+                self._record_booked_range(booking)
+        self._invalidate_cache([booking.id for booking in bookings])
+        errors.sort(key=lambda error: error.index)
+        return bookings, errors
+
+    def _record_booked_range(self, booking: Booking):
+        """ Record booked nights, availability cache entries overlapping them are invalidated after commit """
+        self.session.info.setdefault("booked_ranges", []).append((booking.check_in.date(), booking.check_out.date()))
+
+
+class RoomNightsRepository(BaseRepository):
+    model = RoomNightsORM
+    schema = RoomNight
+
+    async def _disable_statement_timeout(self):
+        # Whole-table scans take longer than statement timeout of API requests, for this transaction only
+        await self.session.execute(text("SET LOCAL statement_timeout = 0"))
+
+    async def backfill(self) -> int:
+        """
+        Insert missing nights of bookings made outside of BookingsRepository (COPY, manual fixes).
+        Nights already booked by another booking are skipped, check() reports them. Returns inserted rows.
+        """
+        bookings = BookingsORM.__table__
+        missing = booking_nights(bookings).where(
+            ~select(self.model.booking_id).where(self.model.booking_id == bookings.c.id).exists()
+        )
+        insert_stmt = (
+            pg_insert(self.model)
+            .from_select(["room_id", "night", "booking_id"], missing)
+            .on_conflict_do_nothing()
+        )
+        await self._disable_statement_timeout()
+        # Statistics of an empty (truncated) room_nights give a nested loop anti join, which scans
+        # the rows inserted by the statement itself for every booking; the hash is built before inserts
+        await self.session.execute(text("SET LOCAL enable_nestloop = off"))
+        result = await self.session.execute(insert_stmt)
+        return result.rowcount
+
+    async def check(self, limit: int = 100) -> tuple[list[tuple[int, int, date]], list[tuple[int, int, date]]]:
+        """
+        Compare room_nights with bookings. Returns up to limit (booking_id, room_id, night) of
+        missing nights (booked but not in room_nights) and of stray nights (in room_nights but not
+        within their booking's stay or of another room).
+        """
+        expected = booking_nights(BookingsORM.__table__).subquery("expected")
+        room_id, night, booking_id = expected.c.room_id, expected.c.night, expected.c.booking_id
+        missing_query = (
+            select(booking_id, room_id, night)
+            .outerjoin(self.model, (self.model.room_id == room_id) & (self.model.night == night) & (self.model.booking_id == booking_id))
+            .where(self.model.booking_id.is_(None))
+            .order_by(booking_id, night)
+            .limit(limit)
+        )
+        stray_query = (
+            select(self.model.booking_id, self.model.room_id, self.model.night)
+            .join(BookingsORM, BookingsORM.id == self.model.booking_id)
+            .where((BookingsORM.room_id != self.model.room_id) | ~BookingsORM.stay.contains(self.model.night))
+            .order_by(self.model.booking_id, self.model.night)
+            .limit(limit)
+        )
+        await self._disable_statement_timeout()
+        missing = [tuple(row) for row in await self.session.execute(missing_query)]
+        stray = [tuple(row) for row in await self.session.execute(stray_query)]
+        return missing, stray
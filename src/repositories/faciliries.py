@@ -2,14 +2,95 @@
 Facilities repository
 """
 
+from sqlalchemy import Integer, Table, all_, any_, bindparam, delete, exists, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from pydantic import BaseModel
+
 from src.models.facilities import FacilitiesORM, RoomsFacilitiesORM
+from src.models.rooms import RoomsORM
 from src.schemas.facilities import Facilities, RoomsFacilities
 from src.repositories.base import BaseRepository
+from src.repositories.rooms import RoomsRepository
+from src.config import settings
 
 class FacilitiesRepository(BaseRepository):
     model = FacilitiesORM
     schema = Facilities
+    cache_ttl = settings.CACHE_TTL
+
+    async def edit(self, data: BaseModel, partial_update: bool = False, **filter_by):
+        facility = await super().edit(data, partial_update=partial_update, **filter_by)
+        if data.model_dump(exclude_unset=partial_update):
+            # Room responses embed facilities, so room ETags must change too
+            await RoomsRepository(self.session).touch_by_facility(facility.id)
+        return facility
 
 class RoomsFacilitiesRepository(BaseRepository):
     model = RoomsFacilitiesORM
-    schema = RoomsFacilities
\ No newline at end of file
+    schema = RoomsFacilities
+
+    async def sync(self, room_id: int, facility_ids: list[int]) -> tuple[list[int], list[int]]:
+        """
+        Make facilities of the room equal to existing facilities of the list with one statement:
+        links not in the list are deleted, missing links are inserted.
+        Unknown facility IDs are skipped, if none of the IDs exist (or the room does not) the room is left unchanged.
+        Returns added and removed facility IDs.
+        """
+        if not facility_ids:
+            return [], []
+        ids = bindparam("ids", facility_ids, type_=ARRAY(Integer))
+        valid = (
+            select(FacilitiesORM.id)
+            .where(FacilitiesORM.id == any_(ids), exists().where(RoomsORM.id == room_id))
+            .cte("valid")
+        )
+        removed = (
+            delete(self.model)
+            .where(
+                self.model.room_id == room_id,
+                self.model.facility_id != all_(ids),
+                exists(select(valid.c.id)),
+            )
+            .returning(self.model.facility_id)
+            .cte("removed")
+        )
+        added = (
+            insert(self.model)
+            .from_select(["room_id", "facility_id"], select(literal(room_id), valid.c.id))
+            .on_conflict_do_nothing(index_elements=["room_id", "facility_id"])
+            .returning(self.model.facility_id)
+            .cte("added")
+        )
+        query = select(literal(True).label("added"), added.c.facility_id).union_all(
+            select(literal(False), removed.c.facility_id)
+        )
+        result = await self.session.execute(query)
+        added_ids, removed_ids = [], []
+        for is_added, facility_id in result:
+            (added_ids if is_added else removed_ids).append(facility_id)
+        if added_ids or removed_ids:
+            self._invalidate_cache()
+        return added_ids, removed_ids
+
+    def _staging_checks(self, staging: Table):
+        return [
+            ("Room not found", ~exists().where(RoomsORM.id == staging.c.room_id)),
+            ("Facility not found", ~exists().where(FacilitiesORM.id == staging.c.facility_id)),
+        ]
+
+    async def merge_staged(self, staging: Table) -> tuple[list[int], list[tuple[int, str]]]:
+        """
+        Add room facilities from bulk import staging table, links which already exist are skipped.
+        Returns room IDs of added links and errors.
+        """
+        errors = await self._delete_invalid_staged(staging)
+        new_links = select(staging.c.room_id, staging.c.facility_id).distinct()
+        insert_stmt = (
+            insert(self.model)
+            .from_select(["room_id", "facility_id"], new_links)
+            .on_conflict_do_nothing(index_elements=["room_id", "facility_id"])
+            .returning(self.model.room_id)
+        )
+        room_ids = (await self.session.execute(insert_stmt)).scalars().all()
+        self._invalidate_cache()
+        return room_ids, errors
@@ -1,35 +1,158 @@
-from datetime import date
-from sqlalchemy import and_, distinct, or_, select
+import operator
+from datetime import date, timedelta
+from functools import reduce
+from sqlalchemy import Date, Text, and_, cast, exists, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
-from src.models.bookings import BookingsORM
+from src.models.bookings import RoomNightsORM
+from src.models.facilities import FacilitiesORM, RoomsFacilitiesORM
 from src.models.hotels import HotelsORM
-from src.models.rooms import RoomsORM
+from src.models.rooms import RoomsORM, RoomTypesORM
 
-from src.schemas.hotels import Hotel
+from src.schemas.hotels import Hotel, HotelCalendarDay, HotelSearchResult
 from src.repositories.base import BaseRepository
+from src.repositories.utils import json_object, room_is_booked
+from src.cache import availability_cache
+from src.config import settings
+from src.utils.serialization import list_adapter
+
+EMPTY_JSON_ARRAY = literal_column("'[]'::json")
 
 
 class HotelsRepository(BaseRepository):
     model = HotelsORM
     schema = Hotel
-    
+    cache_ttl = settings.CACHE_TTL
+
+    def _search(
+            self,
+            query,
+            title: str | None,
+            location: str | None,
+            order_by: str,
+            limit: int,
+            offset: int,
+            after_id: int | None,
+            after_relevance: float | None
+        ):
+        """
+        Apply title/location filters, ordering and pagination to hotels query.
+        Both ILIKE and trigram similarity (%) filters are served by the GIN trigram indexes.
+        Keyset condition is used if cursor is given, so page N costs the same as page 1.
+        """
+        search = [(column, value) for column, value in ((self.model.title, title), (self.model.location, location)) if value]
+        if order_by != "relevance" or not search:
+            # Plain substring search ordered by ID
+            for column, value in search:
+                query = query.filter(column.icontains(value))
+            query = query.order_by(self.model.id).limit(limit)
+            if after_id is not None:
+                return query.where(self.model.id > after_id)
+            return query.offset(offset)
+
+        # Fuzzy search ranked by trigram similarity, ties are ordered by ID
+        for column, value in search:
+            query = query.filter(or_(column.op("%")(value), column.icontains(value)))
+        relevance = reduce(operator.add, (func.similarity(column, value) for column, value in search)).label("relevance")
+        query = query.add_columns(relevance).order_by(relevance.desc(), self.model.id).limit(limit)
+        if after_id is not None and after_relevance is not None:
+            return query.where(
+                or_(
+                    relevance < after_relevance,
+                    and_(relevance == after_relevance, self.model.id > after_id)
+                )
+            )
+        return query.offset(offset)
+
+    def _search_results(self, query_result) -> list[HotelSearchResult]:
+        """ Convert rows of hotels search query to schemas with optional relevance score """
+        hotels = []
+        for row in query_result.all():
+            hotel = HotelSearchResult.model_validate(row[0], from_attributes=True)
+            hotel.relevance = row[1] if len(row) > 1 else None
+            hotels.append(hotel)
+        return hotels
+
     async def get_all(
             self, 
             title: str | None = None,
             location: str | None = None,
             limit: int = 3,
-            offset: int = 0
+            offset: int = 0,
+            after_id: int | None = None,
+            order_by: str = "id",
+            after_relevance: float | None = None
         ):
         query = select(self.model)
-        # Filters
-        query = query.filter(self.model.title.icontains(title)) if title else query
-        query = query.filter(self.model.location.icontains(location)) if location else query
-        # LIMIT and OFFSET
-        query = query.offset(offset).limit(limit)
+        # Filters, ordering and pagination
+        query = self._search(query, title, location, order_by, limit, offset, after_id, after_relevance)
         query_result = await self.session.execute(query)
-        return [self.schema.model_validate(res, from_attributes=True) for res in query_result.scalars().all()]
+        return self._search_results(query_result)
+
+    async def get_full_json(self, hotel_id: int) -> str | None:
+        """
+        Hotel with its rooms, their room types and facilities as JSON text built by Postgres in one query
+        (json_agg of correlated subqueries), without ORM objects and schemas. None if hotel is not found.
+        """
+        facilities = (
+            select(func.json_agg(aggregate_order_by(json_object(FacilitiesORM.__table__), FacilitiesORM.id)))
+            .join(RoomsFacilitiesORM, RoomsFacilitiesORM.facility_id == FacilitiesORM.id)
+            .where(RoomsFacilitiesORM.room_id == RoomsORM.id)
+            .scalar_subquery()
+        )
+        room = json_object(
+            RoomsORM.__table__,
+            room_type=json_object(RoomTypesORM.__table__),
+            facilities=func.coalesce(facilities, EMPTY_JSON_ARRAY),
+        )
+        rooms = (
+            select(func.json_agg(aggregate_order_by(room, RoomsORM.id)))
+            .join(RoomTypesORM, RoomTypesORM.id == RoomsORM.room_type_id)
+            .where(RoomsORM.hotel_id == self.model.id)
+            .scalar_subquery()
+        )
+        hotel = json_object(self.model.__table__, rooms=func.coalesce(rooms, EMPTY_JSON_ARRAY))
+        query = select(cast(hotel, Text)).where(self.model.id == hotel_id)
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def get_calendar(self, hotel_id: int, date_from: date, date_to: date) -> list[HotelCalendarDay]:
+        """
+        Free and booked rooms and the lowest free room price for every night of [date_from, date_to) in one query:
+        series of nights x rooms of the hotel, left joined with room_nights by its (room_id, night) primary key.
+        Empty list if hotel is not found.
+        """
+        # Cached results are invalidated by bookings overlapping the dates
+        cache_key = ("calendar", hotel_id, date_from, date_to)
+        calendar = availability_cache.get(cache_key)
+        if calendar is not None:
+            return calendar
+        cache_generation = availability_cache.generation
+
+        nights = (
+            select(cast(func.generate_series(date_from, date_to - timedelta(days=1), timedelta(days=1)), Date).label("day"))
+            .cte("nights")
+        )
+        is_free = RoomNightsORM.booking_id.is_(None)
+        query = (
+            select(
+                nights.c.day,
+                func.count(RoomsORM.id).filter(is_free).label("free"),
+                func.count(RoomNightsORM.booking_id).label("booked"),
+                func.min(RoomsORM.price).filter(is_free).label("min_price"),
+            )
+            .select_from(nights)
+            .outerjoin(RoomsORM, RoomsORM.hotel_id == hotel_id)
+            .outerjoin(RoomNightsORM, and_(RoomNightsORM.room_id == RoomsORM.id, RoomNightsORM.night == nights.c.day))
+            .where(exists().where(self.model.id == hotel_id))
+            .group_by(nights.c.day)
+            .order_by(nights.c.day)
+        )
+        result = await self.session.execute(query)
+        calendar = list_adapter(HotelCalendarDay).validate_python(result.all(), from_attributes=True)
+        availability_cache.set(cache_key, date_from, date_to, calendar, cache_generation)
+        return calendar
 
-    
     async def get_by_room_id(self, room_id: int):
         """Get a hotel by room_id"""
         from src.models.rooms import RoomsORM
@@ -45,48 +168,33 @@ class HotelsRepository(BaseRepository):
         limit: int = 3,
         offset: int = 0,
         title: str | None = None,
-        location: str | None = None
+        location: str | None = None,
+        after_id: int | None = None,
+        order_by: str = "id",
+        after_relevance: float | None = None
     ):
+        # Cached results are invalidated by bookings overlapping the dates
+        cache_key = ("hotels", check_in, check_out, limit, offset, title, location, after_id, order_by, after_relevance)
+        hotels = availability_cache.get(cache_key)
+        if hotels is not None:
+            return hotels
+        cache_generation = availability_cache.generation
+
         query = select(self.model)
-        # Filters
-        query = query.filter(self.model.title.icontains(title)) if title else query
-        query = query.filter(self.model.location.icontains(location)) if location else query
-        # LIMIT and OFFSET
-        query = query.offset(offset).limit(limit)
-
-        # Define the CTE (Common Table Expression) for rooms_booked
-        rooms_hotels_booked = (
-            select(
-                BookingsORM.id.label("booking_id"), 
-                RoomsORM.hotel_id.label("hotel_id"), 
-                RoomsORM.id.label("room_id")
-            )
-            .join(RoomsORM, BookingsORM.room_id == RoomsORM.id)
-            .where(
-                or_(
-                    and_(
-                        BookingsORM.check_in >= check_in,
-                        BookingsORM.check_in <= check_out
-                    ),
-                    and_(
-                        BookingsORM.check_out >= check_in,
-                        BookingsORM.check_out <= check_out
-                    )
-                )
-            )
-            .cte('rooms_hotels_booked')
-        )
+        # Filters, ordering and pagination
+        query = self._search(query, title, location, order_by, limit, offset, after_id, after_relevance)
 
-        # Define the CTE (Common Table Expression) for available hotels IDs
-        available_hotels_id = (
-            select(distinct(RoomsORM.hotel_id).label("hotel_id"))
+        # Hotels having at least one room without overlapping booking
+        available_rooms = (
+            select(RoomsORM.id)
             .where(
-                RoomsORM.id.not_in(
-                    select(rooms_hotels_booked.c.room_id)
-                )
+                RoomsORM.hotel_id == self.model.id,
+                ~room_is_booked(RoomsORM.id, check_in, check_out)
             )
         )
 
-        query = query.where(self.model.id.in_(available_hotels_id))
+        query = query.where(available_rooms.exists())
         query_result = await self.session.execute(query)
-        return [self.schema.model_validate(res, from_attributes=True) for res in query_result.scalars().all()]
\ No newline at end of file
+        hotels = self._search_results(query_result)
+        availability_cache.set(cache_key, check_in, check_out, hotels, cache_generation)
+        return hotels
\ No newline at end of file
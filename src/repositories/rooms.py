@@ -1,53 +1,54 @@
 from datetime import date
-from sqlalchemy import and_, or_, select
+from sqlalchemy import Table, exists, select, update
 from sqlalchemy.orm import selectinload
-from src.models.bookings import BookingsORM
 from src.repositories.base import BaseRepository
+from src.repositories.utils import room_is_booked
+from src.models.facilities import RoomsFacilitiesORM
+from src.models.hotels import HotelsORM
 from src.models.rooms import RoomsORM, RoomTypesORM
 from src.schemas.rooms import RoomType, RoomsWithFacilities
+from src.cache import availability_cache
+from src.config import settings
 
 class RoomsRepository(BaseRepository):
     model = RoomsORM
     schema = RoomsWithFacilities
 
-    async def get_available_rooms(self, check_in: date, check_out: date):
-        # Define the CTE (Common Table Expression) for rooms_booked
-        rooms_booked_cte = (
-            select(BookingsORM)
-            .where(
-                or_(
-                    and_(
-                        BookingsORM.check_in >= check_in,
-                        BookingsORM.check_in <= check_out
-                    ),
-                    and_(
-                        BookingsORM.check_out >= check_in,
-                        BookingsORM.check_out <= check_out
-                    )
-                )
-            )
-            .cte('rooms_booked')
-        )
-        
-        # Main query to get available rooms
-        available_rooms_query = (
+    def _load_options(self) -> list:
+        return [selectinload(self.model.facilities)]
+
+    def _available_rooms_query(self, check_in: date, check_out: date):
+        # Main query to get rooms without overlapping bookings
+        return (
             select(self.model)
-            .options(selectinload(self.model.facilities))
-            .where(
-                self.model.id.not_in(
-                    select(rooms_booked_cte.c.room_id)
-                )
-            )
+            .options(*self._load_options())
+            .where(~room_is_booked(self.model.id, check_in, check_out))
         )
 
-        result = await self.session.execute(available_rooms_query)
-        result_scalars = result.scalars().all()
-        return [self.schema.model_validate(res, from_attributes=True) for res in result_scalars]
+    async def get_available_rooms(self, check_in: date, check_out: date):
+        # Cached results are invalidated by bookings overlapping the dates
+        cache_key = ("rooms", check_in, check_out)
+        rooms = availability_cache.get(cache_key)
+        if rooms is not None:
+            return rooms
+        cache_generation = availability_cache.generation
+
+        result = await self.session.execute(self._available_rooms_query(check_in, check_out))
+        rooms = self._validate_all(result.scalars().all())
+        availability_cache.set(cache_key, check_in, check_out, rooms, cache_generation)
+        return rooms
+
+    async def stream_available_rooms(self, check_in: date, check_out: date, yield_per: int = 1000):
+        """ Iterate over available rooms with server-side cursor, fetching yield_per rows at a time """
+        query = self._available_rooms_query(check_in, check_out).execution_options(yield_per=yield_per)
+        result = await self.session.stream_scalars(query)
+        async for res in result:
+            yield self.schema.model_validate(res, from_attributes=True)
 
     async def get_one_or_none(self, **filter_by):
         query = (
             select(self.model)
-            .options(selectinload(self.model.facilities))
+            .options(*self._load_options())
             .filter_by(**filter_by)
         )
         result = await self.session.execute(query)
@@ -56,6 +57,24 @@ class RoomsRepository(BaseRepository):
             return None
         return self.schema.model_validate(res, from_attributes=True)
 
+    async def touch_by_facility(self, facility_id: int) -> None:
+        """ Increment version of rooms having the facility, their responses embed facility data """
+        update_stmt = (
+            update(self.model)
+            .values(version=self.model.version + 1)
+            .where(self.model.id.in_(select(RoomsFacilitiesORM.room_id).where(RoomsFacilitiesORM.facility_id == facility_id)))
+            .returning(self.model.id)
+        )
+        result = await self.session.execute(update_stmt)
+        self._invalidate_cache(result.scalars().all())
+
+    def _staging_checks(self, staging: Table):
+        return super()._staging_checks(staging) + [
+            ("Hotel not found", ~exists().where(HotelsORM.id == staging.c.hotel_id)),
+            ("Room type not found", ~exists().where(RoomTypesORM.id == staging.c.room_type_id)),
+        ]
+
 class RoomTypesRepository(BaseRepository):
     model = RoomTypesORM
-    schema = RoomType
\ No newline at end of file
+    schema = RoomType
+    cache_ttl = settings.CACHE_TTL
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Shared query helpers for repositories
+"""
+from datetime import date, timedelta
+from sqlalchemy import ColumnElement, Date, FromClause, Select, cast, exists, func, literal_column, select
+
+from src.models.bookings import RoomNightsORM
+
+
+def room_is_booked(room_id: ColumnElement, check_in: date, check_out: date) -> ColumnElement:
+    """
+    EXISTS clause for a booked night of the room between check-in and check-out dates.
+    Served by range scan of the room_nights (room_id, night) primary key, NOT EXISTS makes an anti-join.
+    """
+    return exists().where(
+        RoomNightsORM.room_id == room_id,
+        RoomNightsORM.night >= check_in,
+        RoomNightsORM.night < check_out,
+    )
+
+
+def booking_nights(bookings: FromClause) -> Select:
+    """ room_nights rows (room_id, night, booking_id) of bookings selectable: one row per night [check_in, check_out) """
+    night = func.generate_series(
+        cast(bookings.c.check_in, Date),
+        cast(bookings.c.check_out, Date) - 1,
+        timedelta(days=1),
+    )
+    return select(bookings.c.room_id, cast(night, Date).label("night"), bookings.c.id.label("booking_id"))
+
+
+def json_object(table, **extra: ColumnElement) -> ColumnElement:
+    """
+    json_build_object of all columns of the table (or its alias) plus extra keys.
+    Keys are column names rendered as literals, so the statement has no parameters for them.
+    """
+    fields = {column.key: column for column in table.columns} | extra
+    return func.json_build_object(*(
+        item for key, value in fields.items() for item in (literal_column(f"'{key}'"), value)
+    ))
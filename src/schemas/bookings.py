@@ -3,6 +3,7 @@ Bookings Schemas
 """
 
 from datetime import date, datetime
+from typing import Literal
 from pydantic import BaseModel, Field
 
 class Booking(BaseModel):
@@ -13,6 +14,11 @@ class Booking(BaseModel):
     check_out: datetime = Field(description="Check-out date")
     total_price: float = Field(description="Total price")
 
+class RoomNight(BaseModel):
+    room_id: int = Field(description="Room ID")
+    night: date = Field(description="Booked night")
+    booking_id: int = Field(description="Booking ID")
+
 class BookingCreateRequest(BaseModel):
     """
     Booking creation Model request for HTTP Request
@@ -28,4 +34,20 @@ class BookingAdd(BookingCreateRequest):
     user_id: int = Field(description="User ID")
     check_in: datetime = Field(description="Check-in datetime")
     check_out: datetime = Field(description="Check-out datetime")
-    total_price: float = Field(description="Total price")
\ No newline at end of file
+    total_price: float = Field(description="Total price")
+
+class BookingBatchRequest(BaseModel):
+    """
+    Batch booking request: all_or_nothing creates either all bookings or none,
+    best_effort creates every booking that can be made and reports the others
+    """
+    items: list[BookingCreateRequest] = Field(description="Bookings to create", min_length=1, max_length=50)
+    mode: Literal["all_or_nothing", "best_effort"] = Field(description="Batch mode", default="all_or_nothing")
+
+class BookingBatchError(BaseModel):
+    index: int = Field(description="Index of the item in request")
+    detail: str = Field(description="Reason why the booking was not created")
+
+class BookingBatchResponse(BaseModel):
+    created: list[Booking] = Field(description="Created bookings")
+    errors: list[BookingBatchError] = Field(description="Items which were not booked")
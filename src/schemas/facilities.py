@@ -12,6 +12,7 @@ class FacilitiesBaseModel(BaseModel):
 
 class Facilities(FacilitiesBaseModel):
     id: int = Field(description="Facility ID", examples=[1])
+    version: int = Field(description="Facility version, changed on every update", examples=[1], default=1)
 
 class FacilitiesCreateRequest(FacilitiesBaseModel):
     pass
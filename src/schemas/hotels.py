@@ -2,10 +2,12 @@
 Pydantic schemas for Hotels
 """
 
-from datetime import time
+from datetime import date, time
 from typing import Optional
 from pydantic import BaseModel, Field
 
+from src.schemas.rooms import RoomsWithFacilities, RoomType
+
 
 class HotelBaseModel(BaseModel):
     title: str = Field(description="Name of the hotel", max_length=100)
@@ -16,6 +18,22 @@ class HotelBaseModel(BaseModel):
 
 class Hotel(HotelBaseModel):
     id: int = Field(description="ID of the hotel")
+    version: int = Field(description="Version of the hotel, changed on every update", default=1)
+
+class HotelSearchResult(Hotel):
+    relevance: float | None = Field(description="Trigram similarity to search terms", default=None)
+
+class HotelRoom(RoomsWithFacilities):
+    room_type: RoomType = Field(description="Type of the room")
+
+class HotelWithRooms(Hotel):
+    rooms: list[HotelRoom] = Field(description="Rooms of the hotel with room types and facilities")
+
+class HotelCalendarDay(BaseModel):
+    day: date = Field(description="Night date")
+    free: int = Field(description="Rooms without booking for the night")
+    booked: int = Field(description="Rooms booked for the night")
+    min_price: int | None = Field(description="Lowest price of free rooms, null if all rooms are booked")
 
 class HotelCreateData(HotelBaseModel):
     pass
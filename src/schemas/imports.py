@@ -0,0 +1,36 @@
+"""
+Pydantic schemas for bulk import
+"""
+
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+
+from src.schemas.facilities import RoomsFacilitiesBaseModel
+from src.schemas.hotels import HotelCreateData
+from src.schemas.rooms import RoomCreateModel
+
+ImportKind = Literal["hotels", "rooms", "room_facilities"]
+ImportFormat = Literal["csv", "ndjson"]
+
+# Rows of import files
+class HotelImportRow(HotelCreateData):
+    id: int | None = Field(description="ID of the hotel to update, a new hotel is created if empty", default=None, gt=0)
+
+class RoomImportRow(RoomCreateModel):
+    id: int | None = Field(description="ID of the room to update, a new room is created if empty", default=None, gt=0)
+    description: Optional[str | None] = Field(description="Description of the room", max_length=200, default=None)
+
+class RoomFacilityImportRow(RoomsFacilitiesBaseModel):
+    pass
+
+# Import results
+class ImportRowError(BaseModel):
+    line: int = Field(description="Line number in the file")
+    detail: str = Field(description="Why the row was not imported")
+
+class ImportResult(BaseModel):
+    kind: ImportKind = Field(description="Kind of imported records")
+    received: int = Field(description="Number of rows in the file")
+    imported: int = Field(description="Number of created or updated records")
+    failed: int = Field(description="Number of rows which were not imported")
+    errors: list[ImportRowError] = Field(description="Errors of rows which were not imported, first ones only")
@@ -17,6 +17,7 @@ class RoomBaseModel(BaseModel):
 class Room(RoomBaseModel):
     id: int = Field(description="ID of the room")
     hotel_id: int = Field(description="ID of the hotel", gt=0)
+    version: int = Field(description="Version of the room, changed on every update", default=1)
 
 class RoomCreateModel(RoomBaseModel):
     hotel_id: int = Field(description="ID of the hotel", gt=0)
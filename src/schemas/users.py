@@ -15,5 +15,8 @@ class UserAddToDB(BaseModel):
     email: EmailStr
     password: str
 
+class UserPasswordUpdate(BaseModel):
+    password: str
+
 class UserResponseLogin(UserResponse):
     password: str
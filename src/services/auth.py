@@ -1,16 +1,36 @@
+import asyncio
+import hashlib
+import math
+import time
 import jwt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
 from src.config import settings
+from src.utils.cache import TTLCache
+from src.utils.metrics import AUTH_HASH_JOBS
 
 JWT_EXPIRATION_TIME = 30
 
+#   bcrypt cost bounds for startup calibration
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+
 #   Auth service
 class AuthService:
     """Auth service"""
     #   Password hashing context
     pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    #   bcrypt releases the GIL, so threads give real parallelism without blocking the event loop
+    hash_executor = ThreadPoolExecutor(max_workers=settings.AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+    #   Number of hashing jobs running or waiting in the executor
+    hash_jobs = 0
+    #   Verified token claims by token digest, kept until token expiration
+    token_cache = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, name="auth_tokens")
+    #   User data for /auth/is_auth by user ID
+    user_cache = TTLCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL, name="auth_users")
 
     def create_access_token(self, data: dict) -> str:
         """Create an access token with expiration time"""
@@ -27,6 +47,76 @@ class AuthService:
         """Verify a password"""
         return self.pwd_context.verify(password, hashed_password)
 
+    async def _run_hash_job(self, func, *args):
+        """Run hashing function in the executor, shed load with 503 if the queue is full"""
+        if AuthService.hash_jobs >= settings.AUTH_HASH_WORKERS + settings.AUTH_HASH_QUEUE_LIMIT:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+        AuthService.hash_jobs += 1
+        AUTH_HASH_JOBS.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.hash_executor, func, *args)
+        finally:
+            AuthService.hash_jobs -= 1
+            AUTH_HASH_JOBS.dec()
+
+    async def hash_password_async(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await self._run_hash_job(self.pwd_context.hash, password)
+
+    async def verify_and_update_password(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verify a password without blocking the event loop.
+        Returns new hash if the stored one uses a different bcrypt cost and should be replaced.
+        """
+        return await self._run_hash_job(self.pwd_context.verify_and_update, password, hashed_password)
+
+    @classmethod
+    def calibrate_bcrypt_rounds(cls) -> int:
+        """
+        Set bcrypt cost: fixed AUTH_BCRYPT_ROUNDS or the highest cost hashing within AUTH_BCRYPT_TARGET_MS.
+        With fixed cost hashes with another cost are reported by verify_and_update_password for rehash on login.
+        Calibrated cost differs between workers and hosts, so it is only a lower bound: hashes are rehashed
+        up to it and never down, otherwise workers would rehash the same password back and forth.
+        """
+        rounds = settings.AUTH_BCRYPT_ROUNDS
+        if rounds is not None:
+            cls.pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds)
+            return rounds
+        # Warm up: the first hash loads and self-tests the bcrypt backend
+        cls.pwd_context.hash("calibration", rounds=4)
+        started = time.perf_counter()
+        cls.pwd_context.hash("calibration", rounds=BCRYPT_MIN_ROUNDS)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # Every extra round doubles hashing time
+        extra_rounds = math.floor(math.log2(settings.AUTH_BCRYPT_TARGET_MS / max(elapsed_ms, 0.001)))
+        rounds = min(max(BCRYPT_MIN_ROUNDS + extra_rounds, BCRYPT_MIN_ROUNDS), BCRYPT_MAX_ROUNDS)
+        cls.pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+        return rounds
+
     def decode_token(self, token: str) -> dict:
         """Decode a token"""
         return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+
+    @staticmethod
+    def _token_key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def decode_token_cached(self, token: str) -> dict:
+        """Decode a token, skip signature verification if the token was already verified and not expired"""
+        token_key = self._token_key(token)
+        payload = self.token_cache.get(token_key)
+        if payload is None:
+            payload = self.decode_token(token)
+            exp = payload.get("exp")
+            # Tokens without expiration are verified every time
+            if exp is not None:
+                self.token_cache.set(token_key, payload, ttl=exp - time.time())
+        return payload
+
+    def forget_token(self, token: str) -> None:
+        """Remove a token from verified tokens cache"""
+        self.token_cache.delete(self._token_key(token))
@@ -0,0 +1,252 @@
+"""
+Bulk import of hotels, rooms and room facilities from CSV or NDJSON.
+
+The upload is read in chunks, rows are validated with pydantic and copied into a temporary
+staging table with COPY (asyncpg copy_records_to_table) in batches. Then repositories check
+references and merge the staging table into their tables with set-based statements
+(see BaseRepository.merge_staged), so the cost per row is a few microseconds instead of a request.
+"""
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Column, Integer, MetaData, String, Table, Time, text
+
+from src.schemas.imports import (
+    HotelImportRow,
+    ImportFormat,
+    ImportKind,
+    ImportResult,
+    ImportRowError,
+    RoomFacilityImportRow,
+    RoomImportRow,
+)
+from src.utils.streaming import CSV_MEDIA_TYPE, NDJSON_MEDIA_TYPE
+
+# Rows sent to the staging table with one COPY
+IMPORT_COPY_ROWS = 10000
+# Row errors returned in the result, the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+# Lines of one CSV record (newlines in quoted values), more is taken for an unclosed quote
+MAX_CSV_RECORD_LINES = 1000
+
+IMPORT_ROW_SCHEMAS: dict[str, type[BaseModel]] = {
+    "hotels": HotelImportRow,
+    "rooms": RoomImportRow,
+    "room_facilities": RoomFacilityImportRow,
+}
+
+
+def import_format(content_type: str | None) -> ImportFormat | None:
+    """ Import format from Content-Type header """
+    content_type = content_type or ""
+    if CSV_MEDIA_TYPE in content_type:
+        return "csv"
+    if NDJSON_MEDIA_TYPE in content_type or "application/jsonl" in content_type:
+        return "ndjson"
+    return None
+
+
+def _staging_table(kind: ImportKind) -> Table:
+    """ Temporary table for rows of the import, dropped on commit """
+    match kind:
+        case "hotels":
+            columns = [
+                Column("id", Integer),
+                Column("title", String(100)),
+                Column("location", String(200)),
+                Column("stars", Integer),
+                Column("check_in", Time),
+                Column("check_out", Time),
+            ]
+        case "rooms":
+            columns = [
+                Column("id", Integer),
+                Column("hotel_id", Integer),
+                Column("room_type_id", Integer),
+                Column("number", String(10)),
+                Column("title", String(100)),
+                Column("description", String),
+                Column("price", Integer),
+            ]
+        case "room_facilities":
+            columns = [
+                Column("room_id", Integer),
+                Column("facility_id", Integer),
+            ]
+    return Table(
+        f"import_{kind}",
+        MetaData(),
+        Column("line", Integer, nullable=False),
+        *columns,
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str | None]]:
+    """ Split uploaded chunks into numbered lines, None for lines that are not valid UTF-8 """
+    line_number = 0
+    rest = b""
+    async for chunk in chunks:
+        *lines, rest = (rest + chunk).split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, _decode_line(line, line_number)
+    if rest:
+        yield line_number + 1, _decode_line(rest, line_number + 1)
+
+
+def _decode_line(raw_line: bytes, line_number: int) -> str | None:
+    try:
+        line = raw_line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+    return line.lstrip("\ufeff") if line_number == 1 else line
+
+
+class _CSVLines:
+    """ Lines queued for csv.reader, it may read them after running out (StopIteration) before """
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, list[str] | str]]:
+    """
+    Parse CSV records, quoted values may contain newlines. One csv.reader parses the whole upload,
+    lines are queued for it once the record has an even number of quotes (all quoted values closed).
+    Yields (first line of the record, values) or (line number, error).
+    """
+    csv_lines = _CSVLines()
+    reader = csv.reader(csv_lines)
+    record_line_number = 0
+    record_lines = 0
+    quotes = 0
+    async for line_number, line in _iter_lines(chunks):
+        if line is None:
+            yield line_number, "Line is not valid UTF-8"
+            continue
+        if not record_lines:
+            if not line.strip():
+                continue
+            record_line_number = line_number
+        csv_lines.lines.append(line + "\n")
+        record_lines += 1
+        quotes += line.count('"')
+        if quotes % 2 and record_lines < MAX_CSV_RECORD_LINES:
+            continue
+        for values in reader:
+            yield record_line_number, values
+        record_lines = quotes = 0
+    # Unclosed quote at the end of the upload, the rest is parsed as its last value
+    for values in reader:
+        yield record_line_number, values
+
+
+async def _iter_rows(chunks: AsyncIterator[bytes], file_format: ImportFormat) -> AsyncIterator[tuple[int, dict | str]]:
+    """
+    Parse rows of CSV with header or NDJSON, one record per line.
+    Yields (line number, row data) or (line number, error) for unparsable lines,
+    CSV rows spanning several lines are numbered by their first line.
+    Empty CSV values are left out, so defaults of the row schema apply.
+    """
+    if file_format == "ndjson":
+        async for line_number, line in _iter_lines(chunks):
+            if line is None:
+                yield line_number, "Line is not valid UTF-8"
+                continue
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, f"Invalid JSON: {e.msg}"
+                continue
+            yield line_number, data if isinstance(data, dict) else "JSON object expected"
+        return
+
+    header = None
+    async for line_number, values in _iter_csv_records(chunks):
+        if isinstance(values, str):
+            yield line_number, values
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, f"Expected {len(header)} values, got {len(values)}"
+            continue
+        yield line_number, {name: value for name, value in zip(header, values) if value != ""}
+
+
+def _validation_error_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors()
+    )
+
+
+async def import_records(db, kind: ImportKind, file_format: ImportFormat, chunks: AsyncIterator[bytes]) -> ImportResult:
+    """
+    Import rows of the upload into the table of the kind within the session of DBManager.
+    Valid rows are imported, invalid ones are reported with line numbers; the caller commits.
+    Rooms reference existing hotels and room types, room facilities existing rooms and facilities,
+    so hotels are imported before their rooms.
+    """
+    row_schema = IMPORT_ROW_SCHEMAS[kind]
+    repository = db.rooms_facilities if kind == "room_facilities" else getattr(db, kind)
+    staging = _staging_table(kind)
+    columns = [column.name for column in staging.columns]
+
+    connection = await db.session.connection()
+    # Merging hundreds of thousands of rows takes longer than statement timeout of API requests
+    await connection.execute(text("SET LOCAL statement_timeout = 0"))
+    await connection.run_sync(staging.create)
+    driver_connection = (await connection.get_raw_connection()).driver_connection
+
+    received = 0
+    errors = []
+    records = []
+    async for line_number, data in _iter_rows(chunks, file_format):
+        received += 1
+        if isinstance(data, str):
+            errors.append((line_number, data))
+            continue
+        try:
+            row = row_schema.model_validate(data)
+        except ValidationError as e:
+            errors.append((line_number, _validation_error_detail(e)))
+            continue
+        records.append((line_number, *(getattr(row, column) for column in columns[1:])))
+        if len(records) >= IMPORT_COPY_ROWS:
+            await driver_connection.copy_records_to_table(staging.name, records=records, columns=columns)
+            records = []
+    if records:
+        await driver_connection.copy_records_to_table(staging.name, records=records, columns=columns)
+
+    # Temporary tables are not analyzed by autovacuum, without statistics checks and merge get bad plans
+    await connection.execute(text(f"ANALYZE {staging.name}"))
+    merged_ids, merge_errors = await repository.merge_staged(staging)
+    if kind == "room_facilities" and merged_ids:
+        # Facilities are part of the room data, so the room ETag must change
+        await db.rooms.touch_bulk(list(set(merged_ids)))
+
+    errors = sorted(errors + merge_errors)
+    return ImportResult(
+        kind=kind,
+        received=received,
+        imported=len(merged_ids),
+        failed=len(errors),
+        errors=[ImportRowError(line=line, detail=detail) for line, detail in errors[:MAX_REPORTED_ERRORS]],
+    )
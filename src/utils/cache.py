@@ -0,0 +1,263 @@
+"""
+Caches: in-process LRU + TTL cache and tag-invalidated cache backends for repositories
+"""
+import bisect
+import logging
+import pickle
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+from src.utils.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger("uvicorn")
+
+
+class CacheCounters:
+    """ Hit/miss counters of a cache, exported to Prometheus (cache_requests_total) if the cache has a name """
+
+    def __init__(self, name: str | None = None):
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter = CACHE_REQUESTS.labels(name, "hit") if name else None
+        self._miss_counter = CACHE_REQUESTS.labels(name, "miss") if name else None
+
+    def _hit(self) -> None:
+        self.hits += 1
+        if self._hit_counter is not None:
+            self._hit_counter.inc()
+
+    def _miss(self) -> None:
+        self.misses += 1
+        if self._miss_counter is not None:
+            self._miss_counter.inc()
+
+
+class TTLCache(CacheCounters):
+    """ Bounded LRU cache with per-entry time to live and hit/miss counters.
+
+    Not thread-safe: use it only from the event loop, never from sync
+    dependencies or handlers that FastAPI runs in the threadpool.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None, name: str | None = None):
+        super().__init__(name)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """ Get value by key, expired entries are dropped and counted as misses """
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self._hit()
+                return value
+            del self._data[key]
+        self._miss()
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """ Store value for ttl seconds (cache default if not given), evict least recently used entries """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            self._data.pop(key, None)
+            return
+        self._data[key] = (None if ttl is None else time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class DateRangeCache:
+    """
+    TTL cache of values computed for a date range (e.g. availability search results).
+    Entries are indexed by range start, so invalidation by a changed date range
+    only visits entries starting before its end.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str | None = None):
+        self.ttl = ttl
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl, name=name)
+        # (start, end, key) sorted by start
+        self._index: list[tuple[date, date, Hashable]] = []
+        # Incremented on every invalidation, see set()
+        self.generation = 0
+
+    @property
+    def hits(self) -> int:
+        return self._entries.hits
+
+    @property
+    def misses(self) -> int:
+        return self._entries.misses
+
+    def get(self, key: Hashable) -> Any:
+        if not self.ttl:
+            return None
+        return self._entries.get(key)
+
+    def set(self, key: Hashable, start: date, end: date, value: Any, generation: int) -> None:
+        """
+        Store value computed for [start, end) range.
+        Skipped if anything was invalidated after the value loading started (generation has changed).
+        """
+        if not self.ttl or generation != self.generation:
+            return
+        self._entries.set(key, value)
+        bisect.insort(self._index, (start, end, key), key=lambda item: item[0])
+        # Drop index items of expired and evicted entries
+        if len(self._index) > 2 * self._entries.maxsize:
+            self._index = [item for item in self._index if item[2] in self._entries._data]
+
+    def invalidate(self, start: date, end: date) -> None:
+        """ Drop entries with ranges overlapping [start, end) """
+        self.generation += 1
+        stop = bisect.bisect_left(self._index, end, key=lambda item: item[0])
+        kept = []
+        for item in self._index[:stop]:
+            if item[1] > start:
+                self._entries.delete(item[2])
+            else:
+                kept.append(item)
+        self._index[:stop] = kept
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._index.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+class CacheBackend(CacheCounters, ABC):
+    """
+    Read-through cache with tag invalidation.
+    Every tag has a version counter, entries keep versions of their tags at load time
+    and become stale as soon as any of their tags is invalidated.
+    """
+
+    def __init__(self):
+        super().__init__("repositories")
+
+    @abstractmethod
+    async def _get_entry(self, key: str, tags: list[str]) -> tuple[tuple | None, list[int]]:
+        """ Get stored (tag versions, value) entry and current versions of tags """
+
+    @abstractmethod
+    async def _set_entry(self, key: str, entry: tuple, ttl: int) -> None:
+        """ Store (tag versions, value) entry for ttl seconds """
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        """ Change versions of tags, entries loaded with older versions become stale """
+
+    async def get_or_load(self, key: str, tags: list[str], ttl: int, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get cached value or call loader and store its result, None results are not cached.
+        Errors of the backend (e.g. unreachable Redis server) are logged and the value is loaded uncached.
+        """
+        try:
+            entry, versions = await self._get_entry(key, tags)
+        except Exception as e:
+            logger.warning(f"Cache backend read failed, loading without cache: {e!r}")
+            self._miss()
+            return await loader()
+        if entry is not None and entry[0] == versions:
+            self._hit()
+            return entry[1]
+        self._miss()
+        value = await loader()
+        # Versions read before loading: if tags were invalidated meanwhile the entry is already stale
+        if value is not None:
+            try:
+                await self._set_entry(key, (versions, value), ttl)
+            except Exception as e:
+                logger.warning(f"Cache backend write failed: {e!r}")
+        return value
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU + TTL cache backend.
+    Tag versions come from one increasing counter and at most max_tags of them are kept (least recently
+    invalidated are dropped). A dropped tag gets the highest dropped version, which is never lower than
+    its own, so entries loaded before its last invalidation stay stale.
+    """
+
+    def __init__(self, maxsize: int, max_tags: int | None = None):
+        super().__init__()
+        self._entries = TTLCache(maxsize=maxsize)
+        self._tag_versions: OrderedDict[str, int] = OrderedDict()
+        self._max_tags = max_tags or maxsize
+        self._version = 0
+        self._dropped_version = 0
+
+    async def _get_entry(self, key: str, tags: list[str]) -> tuple[tuple | None, list[int]]:
+        versions = [self._tag_versions.get(tag, self._dropped_version) for tag in tags]
+        return self._entries.get(key), versions
+
+    async def _set_entry(self, key: str, entry: tuple, ttl: int) -> None:
+        self._entries.set(key, entry, ttl=ttl)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._version += 1
+            self._tag_versions[tag] = self._version
+            self._tag_versions.move_to_end(tag)
+        while len(self._tag_versions) > self._max_tags:
+            _, self._dropped_version = self._tag_versions.popitem(last=False)
+
+
+class RedisCacheBackend(CacheBackend):
+    """ Cache backend for Redis protocol servers, shared by all workers and replicas (needs redis package) """
+
+    def __init__(self, url: str, prefix: str = "cache:"):
+        super().__init__()
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("redis package is required for Redis cache backend") from e
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    async def _get_entry(self, key: str, tags: list[str]) -> tuple[tuple | None, list[int]]:
+        # Entry and tag versions in one round-trip
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.get(self.prefix + key)
+            pipe.mget([self._tag_key(tag) for tag in tags])
+            raw_entry, raw_versions = await pipe.execute()
+        versions = [int(version or 0) for version in raw_versions]
+        return (pickle.loads(raw_entry) if raw_entry else None), versions
+
+    async def _set_entry(self, key: str, entry: tuple, ttl: int) -> None:
+        await self.client.set(self.prefix + key, pickle.dumps(entry), ex=ttl)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(self._tag_key(tag))
+            await pipe.execute()
@@ -0,0 +1,31 @@
+"""
+ETag helpers for conditional GET requests
+"""
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """ Strong ETag from record ID and version (or any other version parts) """
+    return '"' + ".".join(str(part) for part in parts) + '"'
+
+
+def collection_version(items) -> tuple[int, int, int]:
+    """
+    Version of a collection: count, sum of versions and max ID.
+    Updates change the sum, deletes change the count and inserts change the max ID (IDs are never reused).
+    """
+    return len(items), sum(item.version for item in items), max((item.id for item in items), default=0)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """ Check If-None-Match header of the request against the ETag (weak comparison) """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,143 @@
+"""
+Prometheus metrics: route latency, repository calls, DB connection pool, bcrypt executor queue and cache hit rates.
+
+With several uvicorn workers set PROMETHEUS_MULTIPROC_DIR to an empty directory before start:
+every worker writes its values to files there and /metrics aggregates them (multiprocess collector).
+Hot path costs are a counter increment or a histogram observation, pool gauges are updated
+by pool events instead of being collected from the engine on scrape, so they work across processes.
+"""
+import os
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REPOSITORY_CALLS = Counter(
+    "repository_calls_total",
+    "Calls of repository methods",
+    ["repository", "method"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections checked out from the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections open above pool size",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time to get a connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ["cache", "result"],
+)
+AUTH_HASH_JOBS = Gauge(
+    "auth_hash_jobs",
+    "Password hashing jobs running or waiting in the bcrypt executor",
+    multiprocess_mode="livesum",
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """ Pool measuring time spent waiting for a connection (there is no pool event before checkout) """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+
+def instrument_pool(engine: AsyncEngine) -> None:
+    """ Keep pool gauges up to date with checkout/checkin events """
+    pool = engine.sync_engine.pool
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    def on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    event.listen(pool, "checkout", on_checkout)
+    event.listen(pool, "checkin", on_checkin)
+
+
+def count_calls(repository: str, method: str, func):
+    """ Wrap repository method to count calls, the wrapper returns the coroutine (or async generator) as is """
+    counter = REPOSITORY_CALLS.labels(repository, method)
+
+    def wrapper(*args, **kwargs):
+        counter.inc()
+        return func(*args, **kwargs)
+
+    wrapper.__counted__ = func
+    wrapper.__name__ = func.__name__
+    wrapper.__qualname__ = func.__qualname__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+class MetricsMiddleware:
+    """ Pure ASGI middleware observing request latency labelled by route template, not by raw path """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router puts the matched route into the scope
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+            ).observe(time.perf_counter() - started)
+
+
+def metrics_response_body() -> tuple[bytes, str]:
+    """ Metrics of this process or, in multiprocess mode, of all worker processes """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """ Remove live gauges of this worker on shutdown in multiprocess mode """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,112 @@
+"""
+Query budgets: the most SQL statements a route may issue per request (with cold caches).
+
+query_budget() records statements of a block and fails if there are more than allowed:
+
+    with query_budget(route_budget("GET", "/hotels/{hotel_id}")):
+        client.get("/hotels/1")
+
+With QUERY_BUDGET_CHECK the request middleware (src/utils/timing.py) logs requests over budget,
+benchmarks/loadtest.py fails the run if any request went over budget.
+Lower the budget when a route gets cheaper, raise it only with a reason in review.
+
+Eager relationship batches (selectinload, one IN statement per 500 parent rows) grow with the
+data, not with the code, so they are not counted against budgets. Lazy loads still are.
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from src.db import engine as default_engine
+
+# (method, route template): statements per request
+ROUTE_QUERY_BUDGETS: dict[tuple[str, str], int] = {
+    # Auth: user lookup, password rehash on login
+    ("POST", "/auth/register"): 1,
+    ("POST", "/auth/login"): 2,
+    ("POST", "/auth/logout"): 0,
+    ("GET", "/auth/is_auth"): 1,
+    # Hotels: version check for If-None-Match, then the hotel
+    ("GET", "/hotels/"): 1,
+    ("GET", "/hotels/{hotel_id}"): 2,
+    ("GET", "/hotels/{hotel_id}/full"): 1,
+    ("GET", "/hotels/{hotel_id}/calendar"): 1,
+    ("POST", "/hotels/"): 1,
+    ("PUT", "/hotels/{hotel_id}"): 1,
+    ("PATCH", "/hotels/{hotel_id}"): 1,
+    ("DELETE", "/hotels/{hotel_id}"): 1,
+    # Rooms: facilities come in selectinload batches (not counted); room by id checks the version first;
+    # room changes: facilities sync, room statement; create adds the facilities list,
+    # PATCH of facilities only the room version
+    ("GET", "/rooms/available"): 1,
+    ("GET", "/hotels/{hotel_id}/rooms/{room_id}"): 2,
+    ("POST", "/hotels/{hotel_id}/rooms"): 3,
+    ("PUT", "/hotels/{hotel_id}/rooms/{room_id}"): 2,
+    ("PATCH", "/hotels/{hotel_id}/rooms/{room_id}"): 3,
+    ("DELETE", "/hotels/{hotel_id}/rooms/{room_id}"): 1,
+    # Bookings: batch is rooms, overlaps and insert
+    ("GET", "/bookings/me"): 1,
+    ("GET", "/bookings/"): 1,
+    ("POST", "/bookings/"): 1,
+    ("POST", "/bookings/batch"): 3,
+    # Facilities: version check for If-None-Match, then the list
+    ("GET", "/facilities/"): 2,
+    ("POST", "/facilities/"): 1,
+    # Imports: settings, staging table, analyze, checks, merge (COPY is not a statement), rooms have most checks
+    ("POST", "/imports/{kind}"): 8,
+    ("GET", "/metrics"): 0,
+}
+
+
+# Execution option of eager relationship batch loads, set by _mark_batch_load
+BATCH_LOAD_OPTION = "relationship_batch_load"
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _mark_batch_load(orm_execute_state: ORMExecuteState):
+    # Lazy loads (lazy_loaded_from set) are the N+1 the budgets catch, keep them unmarked
+    if orm_execute_state.is_relationship_load and orm_execute_state.lazy_loaded_from is None:
+        orm_execute_state.update_execution_options(**{BATCH_LOAD_OPTION: True})
+
+
+# All sessions (AsyncSession runs a sync Session), budgets and request stats rely on the mark
+event.listen(Session, "do_orm_execute", _mark_batch_load)
+
+
+def is_batch_load(context: ExecutionContext | None) -> bool:
+    """ Whether the statement is an eager relationship batch, not counted against budgets """
+    return context is not None and bool(context.execution_options.get(BATCH_LOAD_OPTION))
+
+
+def route_budget(method: str, path: str) -> int | None:
+    """ Budget of the route by method and route template, None if the route has no budget """
+    return ROUTE_QUERY_BUDGETS.get((method, path))
+
+
+@contextmanager
+def query_budget(max_queries: int, engine: AsyncEngine = default_engine):
+    """
+    Record statements executed by the engine within the block (yields the list of statements,
+    without eager relationship batches) and raise QueryBudgetExceeded if there were more than max_queries.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not is_batch_load(context):
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    if len(statements) > max_queries:
+        raise QueryBudgetExceeded(
+            f"{len(statements)} statements, budget is {max_queries}:\n" + "\n".join(statements)
+        )
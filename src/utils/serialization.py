@@ -0,0 +1,25 @@
+"""
+Fast path for list responses: validation and JSON serialization of whole lists in pydantic-core
+"""
+from functools import cache
+from typing import Iterable
+
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+@cache
+def list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    """ TypeAdapter of list of the schema, built once per schema """
+    return TypeAdapter(list[schema])
+
+
+def json_list_response(schema: type[BaseModel], items: Iterable[BaseModel], headers: dict | None = None) -> Response:
+    """
+    Serialize already validated schemas to JSON bytes in one call.
+    Returning a Response skips response_model re-validation and jsonable_encoder of FastAPI,
+    response_model is still used for docs. Fields of subclasses not in the schema are not serialized.
+    """
+    return Response(content=list_adapter(schema).dump_json(list(items)), media_type=JSON_MEDIA_TYPE, headers=headers)
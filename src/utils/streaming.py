@@ -0,0 +1,65 @@
+"""
+Streaming NDJSON / CSV responses for large collections
+"""
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+# Rows are sent in chunks of about this size instead of one ASGI message per row
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def stream_media_type(request: Request) -> str | None:
+    """ Streaming format requested in Accept header, None for regular JSON response """
+    accept = request.headers.get("accept", "")
+    for media_type in (NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE):
+        if media_type in accept:
+            return media_type
+    return None
+
+
+async def _ndjson_lines(rows: AsyncIterator[BaseModel]) -> AsyncIterator[str]:
+    async for row in rows:
+        yield row.model_dump_json() + "\n"
+
+
+async def _csv_lines(rows: AsyncIterator[BaseModel]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = None
+    async for row in rows:
+        data = row.model_dump(mode="json")
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(data))
+            writer.writeheader()
+        # Nested values (e.g. room facilities) are written as JSON
+        writer.writerow({key: json.dumps(value) if isinstance(value, (list, dict)) else value for key, value in data.items()})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def _chunked(lines: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    chunk = []
+    size = 0
+    async for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(chunk).encode()
+            chunk, size = [], 0
+    if chunk:
+        yield "".join(chunk).encode()
+
+
+def stream_response(rows: AsyncIterator[BaseModel], media_type: str) -> StreamingResponse:
+    """ Encode rows one by one into NDJSON or CSV streaming response """
+    lines = _csv_lines(rows) if media_type == CSV_MEDIA_TYPE else _ndjson_lines(rows)
+    return StreamingResponse(_chunked(lines), media_type=media_type)
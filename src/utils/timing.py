@@ -0,0 +1,156 @@
+"""
+Per-request SQL instrumentation: statements, DB time and rows of every request.
+
+SQLAlchemy cursor hooks add statements to the stats of the current request (context variable),
+the middleware reports them in Server-Timing header and one structured log line per request.
+Statements slower than SLOW_QUERY_MS are logged with their parameters.
+"""
+import contextvars
+import json
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import settings
+from src.utils.query_budget import is_batch_load, route_budget
+
+logger = logging.getLogger("uvicorn")
+
+# Longest logged parameters of slow statements
+MAX_LOGGED_PARAMETERS = 1000
+
+
+class RequestStats:
+    """ Statements, DB time and rows of one request """
+    __slots__ = ("queries", "batch_loads", "db_time", "rows")
+
+    def __init__(self):
+        self.queries = 0
+        # Eager relationship batches among queries, not counted against query budgets
+        self.batch_loads = 0
+        self.db_time = 0.0
+        self.rows = 0
+
+
+# Stats of the request being handled. The object is shared by reference, so statements of
+# threadpool dependencies and streaming tasks (copies of the context) are counted too
+request_stats: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _record_statement(conn, statement, parameters, context, rowcount: int, error: str | None = None):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        if is_batch_load(context):
+            stats.batch_loads += 1
+        stats.db_time += elapsed
+        if rowcount > 0:
+            stats.rows += rowcount
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "duration_ms": round(elapsed * 1000, 2),
+            "statement": statement,
+            "parameters": repr(parameters)[:MAX_LOGGED_PARAMETERS],
+            **({"error": error} if error else {}),
+        }))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_statement(conn, statement, parameters, context, cursor.rowcount)
+
+
+def _handle_error(exception_context):
+    # Failed statements (409 booking conflicts are routine) get no after_cursor_execute,
+    # pop their start time so it does not pile up on the pooled connection, and count them
+    conn = exception_context.connection
+    if conn is None or not conn.info.get("query_started"):
+        return
+    _record_statement(
+        conn,
+        exception_context.statement,
+        exception_context.parameters,
+        exception_context.execution_context,
+        0,
+        type(exception_context.original_exception).__name__,
+    )
+
+
+def install_sql_hooks(engine: AsyncEngine) -> None:
+    """ Count statements of the engine in stats of the current request and log slow statements """
+    if not event.contains(engine.sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+def server_timing(stats: RequestStats, elapsed: float) -> str:
+    """ Server-Timing header value: DB time with statements (and batch loads among them) and rows, and total app time """
+    return (
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries, {stats.batch_loads} batch loads, {stats.rows} rows", '
+        f"app;dur={elapsed * 1000:.2f}"
+    )
+
+
+class SQLTimingMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task and body buffering on the hot path).
+    Server-Timing covers statements issued before the response starts, the log line covers
+    the whole request including streamed bodies.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING:
+                    header = server_timing(stats, time.perf_counter() - started)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
+            if settings.REQUEST_LOG:
+                logger.info(json.dumps({
+                    "event": "request",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "db_queries": stats.queries,
+                    "db_time_ms": round(stats.db_time * 1000, 2),
+                    "db_rows": stats.rows,
+                }))
+            if settings.QUERY_BUDGET_CHECK:
+                route = scope.get("route")
+                budget = route_budget(scope["method"], route.path) if route is not None else None
+                if budget is not None and stats.queries - stats.batch_loads > budget:
+                    logger.warning(json.dumps({
+                        "event": "query_budget_exceeded",
+                        "method": scope["method"],
+                        "route": route.path,
+                        "db_queries": stats.queries,
+                        "db_batch_loads": stats.batch_loads,
+                        "budget": budget,
+                    }))
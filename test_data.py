@@ -1,241 +1,321 @@
-import asyncio
-from datetime import time, datetime
-from sqlalchemy import delete
+"""
+Synthetic data generator for development, benchmarks and CI.
 
-from src.models.hotels import HotelsORM
-from src.models.rooms import RoomsORM, RoomTypesORM
-from src.models.bookings import BookingsORM
-from src.models.users import UsersORM
-from src.models.facilities import FacilitiesORM
+Generates hotels, rooms with facilities, users and bookings with seeded randomness,
+so the same arguments always give the same data. Hotel popularity follows Zipf law:
+a few hotels are booked most of the time, most hotels are rarely booked. Demand is capacity-aware:
+rooms of popular hotels are booked up to MAX_OCCUPANCY and the rest of demand goes to other hotels,
+so the generated number of bookings stays close to the requested one.
+Bookings of a room never overlap. Rows are loaded with COPY, rooms with their facilities
+and bookings are generated and loaded by parallel worker processes, shard by shard.
 
-from src.db import Base, async_session_maker
+All users have password "password123" and emails user<id>@example.com.
 
+Usage:
+    python test_data.py --preset small --truncate
+    python test_data.py --preset large --workers 16 --seed 42 --truncate
+    python test_data.py --hotels 50 --rooms 1000 --bookings 20000 --start-date 2025-07-01
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
 
-# Test data for the app
+import asyncpg
 
-# Facilities
-"""
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    title: Mapped[str] = mapped_column(String(100), nullable=False)
-    description: Mapped[Optional[str | None]] = mapped_column(String(255), nullable=True)
-"""
-facilities = [
-    FacilitiesORM(id=1, title='Free Wi-Fi', description='High-speed wireless internet access throughout the property'),
-    FacilitiesORM(id=2, title='Air Conditioning', description='Climate control system for optimal room temperature'),
-    FacilitiesORM(id=3, title='Mini Bar', description='In-room refrigerated bar with beverages and snacks'),
-    FacilitiesORM(id=4, title='Room Service', description='24/7 in-room dining service available'),
-    FacilitiesORM(id=5, title='Flat Screen TV', description='High-definition television with cable channels'),
-]
+from src.api.dependencies import DBManager
+from src.config import settings
+from src.services.auth import AuthService
 
-# Hotels
-"""
-    title: Mapped[str] = mapped_column(String(100))
-    stars: Mapped[int]
-    location: Mapped[str] = mapped_column(String(200))
-    check_in: Mapped[str] = mapped_column(String(10))
-    check_out: Mapped[str] = mapped_column(String(10))
-"""
-hotels = [
-    HotelsORM(id=1, title='Ocean View Hotel', stars=5, location='Miami Beach', check_in=time(14, 0), check_out=time(12, 0)),
-    HotelsORM(id=2, title='Mountain Retreat', stars=4, location='Aspen', check_in=time(14, 0), check_out=time(12, 0)),
-    # HotelsORM(id=3, title='City Center Inn', stars=3, location='New York', check_in=time(14, 0), check_out=time(12, 0)),
-    # HotelsORM(id=4, title='Desert Oasis', stars=4, location='Palm Springs', check_in=time(14, 0), check_out=time(11, 0)),
-    # HotelsORM(id=5, title='Lakeside Lodge', stars=3, location='Lake Tahoe', check_in=time(14, 0), check_out=time(11, 0)),
-    # HotelsORM(id=6, title='Historic Castle', stars=5, location='Scotland', check_in=time(15, 0), check_out=time(12, 0)),
-    # HotelsORM(id=7, title='Tropical Paradise', stars=4, location='Hawaii', check_in=time(15, 0), check_out=time(12, 0)),
-    # HotelsORM(id=8, title='Business Hub Hotel', stars=3, location='San Francisco', check_in=time(15, 0), check_out=time(11, 0)),
-    # HotelsORM(id=9, title='Countryside Escape', stars=4, location='Napa Valley', check_in=time(15, 0), check_out=time(11, 0)),
-    # HotelsORM(id=10, title='Luxury Spa Resort', stars=5, location='Bali', check_in=time(15, 0), check_out=time(11, 0))
-]
+# Sizes: hotels, rooms, users, bookings
+PRESETS = {
+    "tiny": {"hotels": 2, "rooms": 12, "users": 10, "bookings": 20},
+    "small": {"hotels": 100, "rooms": 2_000, "users": 1_000, "bookings": 20_000},
+    "medium": {"hotels": 1_000, "rooms": 100_000, "users": 100_000, "bookings": 2_000_000},
+    "large": {"hotels": 10_000, "rooms": 1_000_000, "users": 1_000_000, "bookings": 50_000_000},
+}
 
-# Room types
-room_types = [
-    RoomTypesORM(id=1, title='Single Room', description='A room assigned to one person.'),
-    RoomTypesORM(id=2, title='Double Room', description='A room assigned to two people.'),
-    RoomTypesORM(id=3, title='Suite', description='A luxurious room with additional space and amenities.'),
-    RoomTypesORM(id=4, title='Deluxe Room', description='A room with upgraded features and services.'),
-    RoomTypesORM(id=5, title='Family Room', description='A room designed to accommodate families.')
+# Reference data, kept if already present
+FACILITIES = [
+    (1, "Free Wi-Fi", "High-speed wireless internet access throughout the property"),
+    (2, "Air Conditioning", "Climate control system for optimal room temperature"),
+    (3, "Mini Bar", "In-room refrigerated bar with beverages and snacks"),
+    (4, "Room Service", "24/7 in-room dining service available"),
+    (5, "Flat Screen TV", "High-definition television with cable channels"),
 ]
-
-# Rooms
-"""
-    hotel_id: Mapped[int] = mapped_column(ForeignKey("hotels.id"))
-    room_type_id: Mapped[int] = mapped_column(ForeignKey("room_types.id"))
-    number: Mapped[str] = mapped_column(String(10))
-    title: Mapped[str] = mapped_column(String(100))
-    description: Mapped[Optional[str | None]]
-    price: Mapped[int]
-"""
-rooms = [
-    RoomsORM(id=1, hotel_id=1, room_type_id=1, number='101', title='Ocean View Suite', description='A luxurious suite with ocean views.', price=300),
-    RoomsORM(id=2, hotel_id=1, room_type_id=2, number='102', title='Ocean View Double', description='A double room with ocean views.', price=200),
-    RoomsORM(id=3, hotel_id=1, room_type_id=3, number='103', title='Ocean View Single', description='A single room with ocean views.', price=150),
-    RoomsORM(id=4, hotel_id=1, room_type_id=4, number='104', title='Ocean View Deluxe', description='A deluxe room with ocean views.', price=250),
-    RoomsORM(id=5, hotel_id=1, room_type_id=5, number='105', title='Ocean View Family', description='A family room with ocean views.', price=350),
-    RoomsORM(id=6, hotel_id=1, room_type_id=1, number='106', title='Ocean View King', description='A king room with ocean views.', price=280),
-
-    RoomsORM(id=7, hotel_id=2, room_type_id=1, number='201', title='Mountain Retreat Suite', description='A luxurious suite in the mountains.', price=320),
-    RoomsORM(id=8, hotel_id=2, room_type_id=2, number='202', title='Mountain Retreat Double', description='A double room in the mountains.', price=220),
-    RoomsORM(id=9, hotel_id=2, room_type_id=3, number='203', title='Mountain Retreat Single', description='A single room in the mountains.', price=170),
-    RoomsORM(id=10, hotel_id=2, room_type_id=4, number='204', title='Mountain Retreat Deluxe', description='A deluxe room in the mountains.', price=270),
-    RoomsORM(id=11, hotel_id=2, room_type_id=5, number='205', title='Mountain Retreat Family', description='A family room in the mountains.', price=370),
-    RoomsORM(id=12, hotel_id=2, room_type_id=1, number='206', title='Mountain Retreat King', description='A king room in the mountains.', price=300),
-
-    # RoomsORM(id=13, hotel_id=3, room_type_id=1, number='301', title='City Center Suite', description='A luxurious suite in the city center.', price=310),
-    # RoomsORM(id=14, hotel_id=3, room_type_id=2, number='302', title='City Center Double', description='A double room in the city center.', price=210),
-    # RoomsORM(id=15, hotel_id=3, room_type_id=3, number='303', title='City Center Single', description='A single room in the city center.', price=160),
-    # RoomsORM(id=16, hotel_id=3, room_type_id=4, number='304', title='City Center Deluxe', description='A deluxe room in the city center.', price=260),
-    # RoomsORM(id=17, hotel_id=3, room_type_id=5, number='305', title='City Center Family', description='A family room in the city center.', price=360),
-    # RoomsORM(id=18, hotel_id=3, room_type_id=1, number='306', title='City Center King', description='A king room in the city center.', price=290),
-
-    # RoomsORM(id=19, hotel_id=4, room_type_id=1, number='401', title='Desert Oasis Suite', description='A luxurious suite in the desert.', price=330),
-    # RoomsORM(id=20, hotel_id=4, room_type_id=2, number='402', title='Desert Oasis Double', description='A double room in the desert.', price=230),
-    # RoomsORM(id=21, hotel_id=4, room_type_id=3, number='403', title='Desert Oasis Single', description='A single room in the desert.', price=180),
-    # RoomsORM(id=22, hotel_id=4, room_type_id=4, number='404', title='Desert Oasis Deluxe', description='A deluxe room in the desert.', price=280),
-    # RoomsORM(id=23, hotel_id=4, room_type_id=5, number='405', title='Desert Oasis Family', description='A family room in the desert.', price=380),
-    # RoomsORM(id=24, hotel_id=4, room_type_id=1, number='406', title='Desert Oasis King', description='A king room in the desert.', price=310),
-
-    # RoomsORM(id=25, hotel_id=5, room_type_id=1, number='501', title='Lakeside Lodge Suite', description='A luxurious suite by the lake.', price=340),
-    # RoomsORM(id=26, hotel_id=5, room_type_id=2, number='502', title='Lakeside Lodge Double', description='A double room by the lake.', price=240),
-    # RoomsORM(id=27, hotel_id=5, room_type_id=3, number='503', title='Lakeside Lodge Single', description='A single room by the lake.', price=190),
-    # RoomsORM(id=28, hotel_id=5, room_type_id=4, number='504', title='Lakeside Lodge Deluxe', description='A deluxe room by the lake.', price=290),
-    # RoomsORM(id=29, hotel_id=5, room_type_id=5, number='505', title='Lakeside Lodge Family', description='A family room by the lake.', price=390),
-    # RoomsORM(id=30, hotel_id=5, room_type_id=1, number='506', title='Lakeside Lodge King', description='A king room by the lake.', price=320),
-
-    # RoomsORM(id=31, hotel_id=6, room_type_id=1, number='601', title='Historic Castle Suite', description='A luxurious suite in a historic castle.', price=350),
-    # RoomsORM(id=32, hotel_id=6, room_type_id=2, number='602', title='Historic Castle Double', description='A double room in a historic castle.', price=250),
-    # RoomsORM(id=33, hotel_id=6, room_type_id=3, number='603', title='Historic Castle Single', description='A single room in a historic castle.', price=200),
-    # RoomsORM(id=34, hotel_id=6, room_type_id=4, number='604', title='Historic Castle Deluxe', description='A deluxe room in a historic castle.', price=300),
-    # RoomsORM(id=35, hotel_id=6, room_type_id=5, number='605', title='Historic Castle Family', description='A family room in a historic castle.', price=400),
-    # RoomsORM(id=36, hotel_id=6, room_type_id=1, number='606', title='Historic Castle King', description='A king room in a historic castle.', price=330),
-
-    # RoomsORM(id=37, hotel_id=7, room_type_id=1, number='701', title='Tropical Paradise Suite', description='A luxurious suite in a tropical paradise.', price=360),
-    # RoomsORM(id=38, hotel_id=7, room_type_id=2, number='702', title='Tropical Paradise Double', description='A double room in a tropical paradise.', price=260),
-    # RoomsORM(id=39, hotel_id=7, room_type_id=3, number='703', title='Tropical Paradise Single', description='A single room in a tropical paradise.', price=210),
-    # RoomsORM(id=40, hotel_id=7, room_type_id=4, number='704', title='Tropical Paradise Deluxe', description='A deluxe room in a tropical paradise.', price=310),
-    # RoomsORM(id=41, hotel_id=7, room_type_id=5, number='705', title='Tropical Paradise Family', description='A family room in a tropical paradise.', price=410),
-    # RoomsORM(id=42, hotel_id=7, room_type_id=1, number='706', title='Tropical Paradise King', description='A king room in a tropical paradise.', price=340),
-
-    # RoomsORM(id=43, hotel_id=8, room_type_id=1, number='801', title='Business Hub Suite', description='A luxurious suite in a business hub.', price=370),
-    # RoomsORM(id=44, hotel_id=8, room_type_id=2, number='802', title='Business Hub Double', description='A double room in a business hub.', price=270),
-    # RoomsORM(id=45, hotel_id=8, room_type_id=3, number='803', title='Business Hub Single', description='A single room in a business hub.', price=220),
-    # RoomsORM(id=46, hotel_id=8, room_type_id=4, number='804', title='Business Hub Deluxe', description='A deluxe room in a business hub.', price=320),
-    # RoomsORM(id=47, hotel_id=8, room_type_id=5, number='805', title='Business Hub Family', description='A family room in a business hub.', price=420),
-    # RoomsORM(id=48, hotel_id=8, room_type_id=1, number='806', title='Business Hub King', description='A king room in a business hub.', price=350),
-
-    # RoomsORM(id=49, hotel_id=9, room_type_id=1, number='901', title='Countryside Escape Suite', description='A luxurious suite in the countryside.', price=380),
-    # RoomsORM(id=50, hotel_id=9, room_type_id=2, number='902', title='Countryside Escape Double', description='A double room in the countryside.', price=280),
-    # RoomsORM(id=51, hotel_id=9, room_type_id=3, number='903', title='Countryside Escape Single', description='A single room in the countryside.', price=230),
-    # RoomsORM(id=52, hotel_id=9, room_type_id=4, number='904', title='Countryside Escape Deluxe', description='A deluxe room in the countryside.', price=330),
-    # RoomsORM(id=53, hotel_id=9, room_type_id=5, number='905', title='Countryside Escape Family', description='A family room in the countryside.', price=430),
-    # RoomsORM(id=54, hotel_id=9, room_type_id=1, number='906', title='Countryside Escape King', description='A king room in the countryside.', price=360),
-
-    # RoomsORM(id=55, hotel_id=10, room_type_id=1, number='1001', title='Luxury Spa Resort Suite', description='A luxurious suite in a spa resort.', price=390),
-    # RoomsORM(id=56, hotel_id=10, room_type_id=2, number='1002', title='Luxury Spa Resort Double', description='A double room in a spa resort.', price=290),
-    # RoomsORM(id=57, hotel_id=10, room_type_id=3, number='1003', title='Luxury Spa Resort Single', description='A single room in a spa resort.', price=240),
-    # RoomsORM(id=58, hotel_id=10, room_type_id=4, number='1004', title='Luxury Spa Resort Deluxe', description='A deluxe room in a spa resort.', price=340),
-    # RoomsORM(id=59, hotel_id=10, room_type_id=5, number='1005', title='Luxury Spa Resort Family', description='A family room in a spa resort.', price=440),
-    # RoomsORM(id=60, hotel_id=10, room_type_id=1, number='1006', title='Luxury Spa Resort King', description='A king room in a spa resort.', price=370),
+ROOM_TYPES = [
+    (1, "Single Room", "A room assigned to one person.", 1.0),
+    (2, "Double Room", "A room assigned to two people.", 1.4),
+    (3, "Suite", "A luxurious room with additional space and amenities.", 2.5),
+    (4, "Deluxe Room", "A room with upgraded features and services.", 1.8),
+    (5, "Family Room", "A room designed to accommodate families.", 2.0),
 ]
 
-# Bookings
-"""
-    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
-    room_id: Mapped[int] = mapped_column(Integer, ForeignKey("rooms.id"), nullable=False)
-    check_in: Mapped[datetime] = mapped_column(DateTime, nullable=False)
-    check_out: Mapped[datetime] = mapped_column(DateTime, nullable=False)
-    total_price: Mapped[float] = mapped_column(Float, nullable=False)
-"""
-bookings = [
-    BookingsORM(id=1, user_id=7, room_id=1, check_in=datetime(2025, 7, 1, 14, 0), check_out=datetime(2025, 7, 3, 12, 0), total_price=600),
-    BookingsORM(id=2, user_id=8, room_id=1, check_in=datetime(2025, 7, 4, 14, 0), check_out=datetime(2025, 7, 8, 12, 0), total_price=500),
-    BookingsORM(id=3, user_id=7, room_id=7, check_in=datetime(2025, 7, 5, 14, 0), check_out=datetime(2025, 7, 12, 12, 0), total_price=300),
-    BookingsORM(id=4, user_id=7, room_id=10, check_in=datetime(2025, 7, 10, 14, 0), check_out=datetime(2025, 7, 15, 12, 0), total_price=400),
-    BookingsORM(id=5, user_id=8, room_id=5, check_in=datetime(2025, 7, 9, 14, 0), check_out=datetime(2025, 7, 10, 12, 0), total_price=500),
-    BookingsORM(id=6, user_id=8, room_id=12, check_in=datetime(2025, 7, 12, 14, 0), check_out=datetime(2025, 7, 15, 12, 0), total_price=600),
-    BookingsORM(id=7, user_id=8, room_id=6, check_in=datetime(2025, 7, 15, 14, 0), check_out=datetime(2025, 7, 20, 12, 0), total_price=700),
-    BookingsORM(id=8, user_id=7, room_id=8, check_in=datetime(2025, 7, 1, 14, 0), check_out=datetime(2025, 7, 15, 12, 0), total_price=500),
-    BookingsORM(id=9, user_id=7, room_id=9, check_in=datetime(2025, 7, 10, 14, 0), check_out=datetime(2025, 7, 20, 12, 0), total_price=900),
-    BookingsORM(id=10, user_id=8, room_id=11, check_in=datetime(2025, 7, 5, 14, 0), check_out=datetime(2025, 7, 25, 12, 0), total_price=300),
-    BookingsORM(id=11, user_id=8, room_id=4, check_in=datetime(2025, 7, 2, 14, 0), check_out=datetime(2025, 7, 20, 12, 0), total_price=400),
+HOTEL_ADJECTIVES = ["Ocean View", "Mountain", "City Center", "Desert", "Lakeside", "Historic", "Tropical",
+                    "Business", "Countryside", "Luxury", "Grand", "Royal", "Sunset", "Harbor", "Garden"]
+HOTEL_NOUNS = ["Hotel", "Retreat", "Inn", "Oasis", "Lodge", "Castle", "Paradise", "Hub", "Escape", "Resort",
+               "Suites", "Palace", "House", "Plaza", "Residence"]
+LOCATIONS = ["Miami Beach", "Aspen", "New York", "Palm Springs", "Lake Tahoe", "Scotland", "Hawaii",
+             "San Francisco", "Napa Valley", "Bali", "Paris", "Rome", "Barcelona", "Lisbon", "Prague",
+             "Vienna", "Berlin", "Amsterdam", "Istanbul", "Dubai", "Tokyo", "Kyoto", "Bangkok", "Sydney"]
 
-]
+CHECK_IN_TIME = dt_time(14, 0)
+CHECK_OUT_TIME = dt_time(12, 0)
+PASSWORD = "password123"
 
-async def add_data_to_db(data: list, model: Base):
-    async with async_session_maker() as session:
-        print(f"Adding {model.__tablename__}...")
-        for item in data:
-            session.add(item)
-        await session.commit()
+# Rows sent with one COPY
+COPY_BATCH_ROWS = 50_000
+# Rooms generated and loaded by a worker at once, shards don't depend on number of workers to keep data reproducible
+ROOMS_PER_SHARD = 10_000
+# Stay length in nights: 1 + exponential with this mean, capped
+MEAN_EXTRA_NIGHTS = 2.0
+MAX_NIGHTS = 21
+# Share of nights of the horizon a room can be booked for, free nights leave room for random gaps
+MAX_OCCUPANCY = 0.8
 
-async def delete_db_data(model: Base):
-    # Delete all items
-    async with async_session_maker() as session:
-        print(f"Deleting {model.__tablename__}...")
-        await session.execute(delete(model))
-        await session.commit()
 
-if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
-    # Ask where to replace the data
-    print("Where to replace the data?")
-    print("1. Room types")
-    print("2. Rooms")
-    print("3. Hotels")
-    print("4. Bookings")
-    print("5. Facilities")
-    print("6. All")
-    choice = input("Enter the number of the option: ")
-    if choice == "1":
-        print("Replacing room types...")
-        loop.run_until_complete(delete_db_data(RoomsORM))
-        loop.run_until_complete(delete_db_data(RoomTypesORM))
-        loop.run_until_complete(add_data_to_db(room_types, RoomTypesORM))
-        loop.run_until_complete(add_data_to_db(rooms, RoomsORM))
-    elif choice == "2":
-        print("Replacing rooms...")
-        loop.run_until_complete(delete_db_data(RoomsORM))
-        loop.run_until_complete(add_data_to_db(rooms, RoomsORM))
-    elif choice == "3":
-        print("Replacing hotels...")
-        loop.run_until_complete(delete_db_data(RoomsORM))
-        loop.run_until_complete(delete_db_data(HotelsORM))
-        loop.run_until_complete(add_data_to_db(hotels, HotelsORM))
-        loop.run_until_complete(add_data_to_db(rooms, RoomsORM))
-    elif choice == "4":
-        print("Replacing bookings...")
-        loop.run_until_complete(delete_db_data(BookingsORM))
-        loop.run_until_complete(add_data_to_db(bookings, BookingsORM))
-    elif choice == "5":
-        print("Replacing facilities...")
-        loop.run_until_complete(delete_db_data(FacilitiesORM))
-        loop.run_until_complete(add_data_to_db(facilities, FacilitiesORM))
-    elif choice == "6":
-        print("Replacing all...")
-        loop.run_until_complete(delete_db_data(BookingsORM))
-        loop.run_until_complete(delete_db_data(RoomsORM))
-        loop.run_until_complete(delete_db_data(RoomTypesORM))
-        loop.run_until_complete(delete_db_data(HotelsORM))
-        loop.run_until_complete(delete_db_data(FacilitiesORM))
-        loop.run_until_complete(add_data_to_db(facilities, FacilitiesORM))
-        loop.run_until_complete(add_data_to_db(hotels, HotelsORM))
-        loop.run_until_complete(add_data_to_db(room_types, RoomTypesORM))
-        loop.run_until_complete(add_data_to_db(rooms, RoomsORM))
-        loop.run_until_complete(add_data_to_db(bookings, BookingsORM))
-        print("Done!")
+def dsn() -> str:
+    return f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
 
 
-"""
-Select all rooms that are not booked between 2025-07-01 and 2025-07-20
-
-with rooms_booked as (
-	SELECT *
-	FROM bookings b
-	WHERE b.check_in between date('2025-07-01') and date('2025-07-20')
-	or b.check_out between date('2025-07-01') and date('2025-07-20')
-)
-select *
-from rooms r
-where r.id not in (select room_id from rooms_booked);
-"""
+def hotel_of_room(room_index: int, rooms: int, hotels: int) -> int:
+    """ Hotel index of the room: rooms are split between hotels in contiguous blocks """
+    return room_index * hotels // rooms
+
+
+def first_room_of_hotel(hotel_index: int, rooms: int, hotels: int) -> int:
+    return -(-hotel_index * rooms // hotels)
+
+
+def hotel_popularity(hotel_index: int, hotels: int, zipf_s: float) -> float:
+    """ Zipf weight of the hotel, ranks are shuffled so popular hotels are not the first IDs """
+    rank = (hotel_index * 7919) % hotels + 1 if hotels % 7919 else hotel_index + 1
+    return 1 / rank ** zipf_s
+
+
+def room_capacity(days: int) -> float:
+    """ Most bookings expected per room: stays of mean length fill MAX_OCCUPANCY of the horizon """
+    # Mean of 1 + min(MAX_NIGHTS - 1, floor of exponential), the floor is geometric
+    mean_nights = 1 + sum(math.exp(-k / MEAN_EXTRA_NIGHTS) for k in range(1, MAX_NIGHTS))
+    return MAX_OCCUPANCY * days / mean_nights
+
+
+def booking_demand(args) -> float:
+    """
+    Scale of room demand: a room expects min(capacity, scale * popularity of its hotel) bookings,
+    the scale is picked so that all rooms expect args.bookings. Demand over capacity of popular hotels
+    goes to less popular ones instead of being lost to full calendars.
+    """
+    capacity = room_capacity(args.days)
+    hotels = [
+        (hotel_popularity(hotel, args.hotels, args.zipf_s),
+         first_room_of_hotel(hotel + 1, args.rooms, args.hotels) - first_room_of_hotel(hotel, args.rooms, args.hotels))
+        for hotel in range(args.hotels)
+    ]
+    low, high = 0.0, capacity / min(popularity for popularity, _ in hotels)
+    for _ in range(100):
+        scale = (low + high) / 2
+        if sum(min(capacity, scale * popularity) * rooms for popularity, rooms in hotels) < args.bookings:
+            low = scale
+        else:
+            high = scale
+    return high
+
+
+async def copy_rows(connection: asyncpg.Connection, table: str, columns: list[str], rows):
+    """ COPY rows in batches """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= COPY_BATCH_ROWS:
+            await connection.copy_records_to_table(table, records=batch, columns=columns)
+            batch = []
+    if batch:
+        await connection.copy_records_to_table(table, records=batch, columns=columns)
+
+
+def generate_hotels(args, id_offset: int):
+    rng = random.Random(f"{args.seed}:hotels")
+    for index in range(args.hotels):
+        yield (
+            id_offset + index + 1,
+            f"{rng.choice(HOTEL_ADJECTIVES)} {rng.choice(HOTEL_NOUNS)} {index + 1}",
+            rng.choice(LOCATIONS),
+            rng.choices([1, 2, 3, 4, 5], weights=[5, 15, 35, 30, 15])[0],
+            CHECK_IN_TIME,
+            CHECK_OUT_TIME,
+        )
+
+
+def generate_users(args, id_offset: int, password_hash: str):
+    for index in range(args.users):
+        user_id = id_offset + index + 1
+        yield user_id, f"user{user_id}@example.com", password_hash
+
+
+def generate_stays(rng: random.Random, count: int, start: date, days: int):
+    """ count non-overlapping stays within [start, start + days) as (check_in, check_out) dates """
+    nights = [min(MAX_NIGHTS, 1 + int(rng.expovariate(1 / MEAN_EXTRA_NIGHTS))) for _ in range(count)]
+    while nights and sum(nights) > days:
+        nights.pop()
+    # Free nights are split randomly into gaps before, between and after stays
+    free = days - sum(nights)
+    cuts = sorted(rng.randint(0, free) for _ in range(len(nights)))
+    day = 0
+    previous_cut = 0
+    for stay_nights, cut in zip(nights, cuts):
+        day += cut - previous_cut
+        previous_cut = cut
+        check_in = start + timedelta(days=day)
+        day += stay_nights
+        yield check_in, start + timedelta(days=day)
+
+
+async def load_rooms_shard(args, shard_start: int, shard_end: int, offsets: dict, demand: float) -> tuple[int, int]:
+    """ Generate and COPY rooms [shard_start, shard_end) with their facilities and bookings """
+    rng = random.Random(f"{args.seed}:rooms:{shard_start}")
+    capacity = room_capacity(args.days)
+    rooms, facilities, bookings = [], [], []
+    for room_index in range(shard_start, shard_end):
+        room_id = offsets["rooms"] + room_index + 1
+        hotel_index = hotel_of_room(room_index, args.rooms, args.hotels)
+        room_type_id, room_type_title, _, price_factor = rng.choice(ROOM_TYPES)
+        price = int(rng.randint(50, 200) * price_factor)
+        number = str(101 + room_index - first_room_of_hotel(hotel_index, args.rooms, args.hotels))
+        rooms.append((
+            room_id,
+            offsets["hotels"] + hotel_index + 1,
+            room_type_id,
+            number,
+            f"{room_type_title} {number}",
+            None,
+            price,
+        ))
+        facilities.extend((room_id, facility[0]) for facility in FACILITIES if rng.random() < 0.6)
+
+        # Expected number of bookings is proportional to popularity of the hotel, up to capacity of the room
+        expected = min(capacity, demand * hotel_popularity(hotel_index, args.hotels, args.zipf_s))
+        count = int(expected) + (rng.random() < expected - int(expected))
+        for check_in, check_out in generate_stays(rng, count, args.start_date, args.days):
+            nights = (check_out - check_in).days
+            bookings.append((
+                offsets["users"] + rng.randrange(args.users) + 1,
+                room_id,
+                datetime.combine(check_in, CHECK_IN_TIME),
+                datetime.combine(check_out, CHECK_OUT_TIME),
+                float(nights * price),
+            ))
+
+    connection = await asyncpg.connect(dsn())
+    try:
+        async with connection.transaction():
+            await copy_rows(connection, "rooms", ["id", "hotel_id", "room_type_id", "number", "title", "description", "price"], rooms)
+            await copy_rows(connection, "rooms_facilities", ["room_id", "facility_id"], facilities)
+            await copy_rows(connection, "bookings", ["user_id", "room_id", "check_in", "check_out", "total_price"], bookings)
+    finally:
+        await connection.close()
+    return len(rooms), len(bookings)
+
+
+def load_rooms_shard_process(*args) -> tuple[int, int]:
+    """ Entry point of worker process """
+    return asyncio.run(load_rooms_shard(*args))
+
+
+async def load(args):
+    connection = await asyncpg.connect(dsn())
+    try:
+        if args.truncate:
+            print("Truncating tables...")
+            await connection.execute(
+                "TRUNCATE room_nights, bookings, rooms_facilities, rooms, room_types, hotels, facilities, users RESTART IDENTITY CASCADE"
+            )
+        await connection.executemany(
+            "INSERT INTO facilities (id, title, description) VALUES ($1, $2, $3) ON CONFLICT (id) DO NOTHING",
+            FACILITIES
+        )
+        await connection.executemany(
+            "INSERT INTO room_types (id, title, description) VALUES ($1, $2, $3) ON CONFLICT (id) DO NOTHING",
+            [room_type[:3] for room_type in ROOM_TYPES]
+        )
+        # New rows get IDs after existing ones, so the generator can add data to a non-empty database
+        offsets = {
+            table: await connection.fetchval(f"SELECT coalesce(max(id), 0) FROM {table}")
+            for table in ("hotels", "rooms", "users")
+        }
+
+        password_hash = AuthService().hash_password(PASSWORD)
+        print(f"Loading {args.hotels} hotels and {args.users} users...")
+        async with connection.transaction():
+            await copy_rows(connection, "hotels", ["id", "title", "location", "stars", "check_in", "check_out"], generate_hotels(args, offsets["hotels"]))
+            await copy_rows(connection, "users", ["id", "email", "password"], generate_users(args, offsets["users"], password_hash))
+    finally:
+        await connection.close()
+
+    print(f"Loading {args.rooms} rooms with facilities and about {args.bookings} bookings in {args.workers} workers...")
+    demand = booking_demand(args)
+    bounds = [*range(0, args.rooms, ROOMS_PER_SHARD), args.rooms]
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(executor, load_rooms_shard_process, args, start, end, offsets, demand)
+            for start, end in zip(bounds, bounds[1:])
+        ))
+    bookings = sum(shard_bookings for _, shard_bookings in results)
+
+    # Booked nights of copied bookings, the app keeps them in room_nights for availability checks
+    print("Filling room nights...")
+    async with DBManager() as db:
+        await db.room_nights.backfill()
+        await db.commit()
+
+    connection = await asyncpg.connect(dsn())
+    try:
+        # Rows were copied with explicit IDs, move sequences past them
+        for table in ("hotels", "rooms", "users", "facilities", "room_types"):
+            await connection.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+            )
+        print("Analyzing tables...")
+        await connection.execute("ANALYZE hotels, rooms, rooms_facilities, users, bookings, room_nights")
+    finally:
+        await connection.close()
+    return bookings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic hotels, rooms, users and bookings")
+    parser.add_argument("--preset", choices=PRESETS, default="tiny", help="data size preset")
+    parser.add_argument("--hotels", type=int, help="number of hotels, overrides preset")
+    parser.add_argument("--rooms", type=int, help="number of rooms, overrides preset")
+    parser.add_argument("--users", type=int, help="number of users, overrides preset")
+    parser.add_argument("--bookings", type=int, help="approximate number of bookings, overrides preset")
+    parser.add_argument("--seed", type=int, default=1, help="random seed, same seed gives same data")
+    parser.add_argument("--workers", type=int, default=4, help="parallel loading processes")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date.today(), help="first night of bookings")
+    parser.add_argument("--days", type=int, default=365, help="bookings horizon in days")
+    parser.add_argument("--zipf-s", type=float, default=1.0, help="Zipf exponent of hotel popularity, 0 for uniform")
+    parser.add_argument("--truncate", action="store_true", help="delete all data before loading")
+    args = parser.parse_args()
+    for name, value in PRESETS[args.preset].items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+    if args.hotels < 1 or args.rooms < args.hotels or args.users < 1:
+        parser.error("at least one hotel and user and one room per hotel are needed")
+    capacity = int(args.rooms * room_capacity(args.days))
+    if args.bookings > capacity:
+        parser.error(f"{args.rooms} rooms fit about {capacity} bookings in {args.days} days, use more rooms or days")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    started = time.perf_counter()
+    bookings = asyncio.run(load(args))
+    print(
+        f"Done in {time.perf_counter() - started:.1f}s: {args.hotels} hotels, {args.rooms} rooms, "
+        f"{args.users} users, {bookings} bookings (seed {args.seed})"
+    )
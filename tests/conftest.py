@@ -0,0 +1,149 @@
+"""
+Shared fixtures. Settings are read from the environment and .env like the app does,
+defaults below only let tests that don't need a database run without them.
+
+Tests using the database fixture run against TEST_DB_NAME (booking_test by default) on the configured
+server: it is created if missing, its tables are recreated from the models and filled by test_data.py
+with the tiny preset. They are skipped if Postgres is not reachable.
+"""
+import asyncio
+import os
+from contextlib import contextmanager
+from datetime import date
+from types import SimpleNamespace
+
+# Never run against the development database; caches are off so statement counts are of cold requests
+os.environ["DB_NAME"] = os.environ.get("TEST_DB_NAME", "booking_test")
+os.environ["CACHE_BACKEND"] = "none"
+os.environ["AVAILABILITY_CACHE_TTL"] = "0"
+os.environ["AUTH_BCRYPT_ROUNDS"] = "4"
+
+for name, value in {
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "postgres",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_ECHO": "false",
+    "JWT_SECRET_KEY": "test",
+    "JWT_ALGORITHM": "HS256",
+}.items():
+    os.environ.setdefault(name, value)
+
+import asyncpg
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+import test_data
+from main import app
+from src.config import settings
+from src.db import Base, engine as app_engine
+from src.services.auth import AuthService
+from src.utils.query_budget import query_budget as check_query_budget, route_budget
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class StubResult:
+    def __init__(self, rows: list):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class StubSession:
+    """ AsyncSession stand-in recording executed statements, every statement returns rows """
+    def __init__(self, rows: list | None = None):
+        self.rows = rows or []
+        self.statements = []
+        self.info = {}
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return StubResult(self.rows)
+
+
+@pytest.fixture
+def stub_session():
+    return StubSession()
+
+
+async def create_database():
+    connection = await asyncpg.connect(
+        user=settings.DB_USER, password=settings.DB_PASSWORD, host=settings.DB_HOST, port=settings.DB_PORT, database="postgres"
+    )
+    try:
+        if not await connection.fetchval("SELECT 1 FROM pg_database WHERE datname = $1", settings.DB_NAME):
+            await connection.execute(f'CREATE DATABASE "{settings.DB_NAME}"')
+    finally:
+        await connection.close()
+
+    engine = create_async_engine(settings.DB_URL, poolclass=NullPool)
+    try:
+        async with engine.begin() as connection:
+            await connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS btree_gist")
+            await connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+    finally:
+        await engine.dispose()
+
+    await test_data.load(SimpleNamespace(
+        **test_data.PRESETS["tiny"],
+        seed=1,
+        workers=1,
+        start_date=date.today(),
+        days=365,
+        zipf_s=1.0,
+        truncate=False,
+    ))
+    # test_data.py fills room_nights with the app engine, its connections belong to this event loop
+    await app_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def database():
+    """ Test database with schema of the models and tiny preset data """
+    try:
+        asyncio.run(create_database())
+    except (OSError, asyncpg.PostgresError) as e:
+        pytest.skip(f"Postgres is not available: {e}")
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    """
+    Client of the app logged in as user 1. One client (and event loop) for the session,
+    so pooled connections of the app engine stay on the loop that opened them.
+    """
+    with TestClient(app) as client:
+        # Login cookie is secure and not sent to http://testserver, set it directly
+        client.cookies.set("access_token", AuthService().create_access_token({"id": 1}))
+        yield client
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Context manager checking statements of a request against the budget of its route:
+        with query_budget("GET", "/hotels/{hotel_id}"):
+            client.get("/hotels/1")
+    Prints the statement count, run pytest with -s to see them when changing budgets.
+    """
+    @contextmanager
+    def check(method: str, path: str):
+        budget = route_budget(method, path)
+        assert budget is not None, f"{method} {path} has no query budget"
+        with check_query_budget(budget) as statements:
+            yield statements
+        print(f"{method} {path}: {len(statements)} statements, budget {budget}")
+
+    return check
@@ -0,0 +1,36 @@
+"""
+Parallel bookings of the same room and nights: exactly one must succeed, the rest get 409
+"""
+import asyncio
+import statistics
+from collections import Counter
+from datetime import date, timedelta
+
+import httpx
+
+from benchmarks.booking_race import book, percentile
+from main import app
+
+# As many as benchmarks/booking_race.py sends by default, far more than the connection pool
+REQUESTS = 300
+
+
+def test_parallel_bookings_of_one_room(client):
+    check_in = date.today() + timedelta(days=4 * 365)
+    payload = {"room_id": 5, "check_in": str(check_in), "check_out": str(check_in + timedelta(days=2))}
+
+    async def race():
+        # Requests run on the event loop of the session client, where the app engine pool lives
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver", cookies=client.cookies) as race_client:
+            return await asyncio.gather(*(book(race_client, payload) for _ in range(REQUESTS)))
+
+    results = client.portal.call(race)
+
+    statuses = Counter(code for code, _ in results)
+    latencies = [elapsed for _, elapsed in results]
+    print(
+        f"{REQUESTS} parallel bookings: {dict(statuses)}, latency ms p50={statistics.median(latencies):.1f} "
+        f"p99={percentile(latencies, 99):.1f}"
+    )
+    assert statuses == {201: 1, 409: REQUESTS - 1}
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from main import app
+from src.api.dependencies import get_current_user_id, get_db
+from src.repositories.bookings import BookingsRepository
+
+
+def compiled(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_my_bookings_are_filtered_by_caller(stub_session):
+    app.dependency_overrides[get_db] = lambda: SimpleNamespace(bookings=BookingsRepository(stub_session))
+    app.dependency_overrides[get_current_user_id] = lambda: 7
+    try:
+        response = TestClient(app).get("/bookings/me")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    [statement] = stub_session.statements
+    assert "WHERE bookings.user_id = 7" in compiled(statement)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("order_by, condition", [
+    (None, "bookings.id > 10 ORDER BY bookings.id"),
+    ("id", "bookings.id > 10 ORDER BY bookings.id"),
+    ("-id", "bookings.id < 10 ORDER BY bookings.id DESC"),
+])
+async def test_get_all_after_id_follows_order(stub_session, order_by, condition):
+    await BookingsRepository(stub_session).get_all(after_id=10, order_by=order_by, limit=5)
+
+    [statement] = stub_session.statements
+    assert condition in compiled(statement)
+
+
+@pytest.mark.anyio
+async def test_get_all_after_id_needs_id_order(stub_session):
+    with pytest.raises(ValueError):
+        await BookingsRepository(stub_session).get_all(after_id=10, order_by="check_in")
@@ -0,0 +1,24 @@
+"""
+Parsing of bulk imports: CSV records spanning several lines
+"""
+from uuid import uuid4
+
+
+def test_csv_quoted_value_with_line_breaks(client):
+    number = uuid4().hex[:8]
+    body = (
+        "hotel_id,room_type_id,number,title,description,price\r\n"
+        f'1,1,{number},"Room ""Sea View""","First line\r\nsecond line\r\n\r\nlast line",120\r\n'
+        "1,1,802,Broken Room,,not a price\r\n"
+    )
+    response = client.post("/imports/rooms", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["received"], result["imported"], result["failed"]) == (2, 1, 1)
+    # Rows are numbered by their first line
+    assert result["errors"][0]["line"] == 6
+
+    rooms = client.get("/hotels/1/full").json()["rooms"]
+    room = next(room for room in rooms if room["number"] == number)
+    assert room["title"] == 'Room "Sea View"'
+    assert room["description"] == "First line\nsecond line\n\nlast line"
@@ -0,0 +1,254 @@
+"""
+Statements of every budgeted route against src/utils/query_budget.py budgets, one cold request each
+"""
+from datetime import date, timedelta
+from uuid import uuid4
+
+import pytest
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from main import app
+from src.api.dependencies import DBManager
+from src.models.rooms import RoomsORM
+from src.services.auth import AuthService
+from src.utils.query_budget import ROUTE_QUERY_BUDGETS, query_budget as check_query_budget
+
+# Nights after the seeded bookings, always free
+FREE_DATE = date.today() + timedelta(days=3 * 365)
+HOTEL = {"title": "Budget Hotel", "location": "Lisbon", "stars": 3}
+ROOM = {"room_type_id": 1, "number": "901", "title": "Budget Room", "description": None, "price": 100, "facilities": [1, 2]}
+NOT_MATCHING_ETAG = {"If-None-Match": '"0-0"'}
+
+
+def test_every_route_has_budget():
+    routes = {
+        (method.upper(), path)
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+    }
+    assert routes - set(ROUTE_QUERY_BUDGETS) == set()
+
+
+def create_hotel(client) -> int:
+    response = client.post("/hotels/", json=HOTEL)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def create_room(client, hotel_id: int, facilities: list[int]) -> int:
+    response = client.post(f"/hotels/{hotel_id}/rooms", json=ROOM | {"facilities": facilities})
+    assert response.status_code == 200
+    return response.json()["data"]["id"]
+
+
+def test_register(client, query_budget):
+    with query_budget("POST", "/auth/register"):
+        response = client.post("/auth/register", json={"email": f"{uuid4().hex}@example.com", "password": "password123"})
+    assert response.status_code == 200
+
+
+def test_login(client, query_budget):
+    # Seeded password hash has another bcrypt cost, so the login rehashes it
+    with query_budget("POST", "/auth/login"):
+        response = client.post("/auth/login", json={"email": "user2@example.com", "password": "password123"})
+    assert response.status_code == 200
+
+
+def test_logout(client, query_budget):
+    with query_budget("POST", "/auth/logout"):
+        response = client.post("/auth/logout")
+    assert response.status_code == 200
+
+
+def test_is_auth(client, query_budget):
+    AuthService.user_cache.clear()
+    with query_budget("GET", "/auth/is_auth"):
+        response = client.get("/auth/is_auth")
+    assert response.status_code == 200
+
+
+def test_hotels_search(client, query_budget):
+    with query_budget("GET", "/hotels/"):
+        response = client.get("/hotels/", params={"check_in": FREE_DATE, "check_out": FREE_DATE + timedelta(days=2)})
+    assert response.status_code == 200
+    assert response.json()
+
+
+def test_hotel(client, query_budget):
+    with query_budget("GET", "/hotels/{hotel_id}"):
+        response = client.get("/hotels/1", headers=NOT_MATCHING_ETAG)
+    assert response.status_code == 200
+
+
+def test_hotel_full(client, query_budget):
+    with query_budget("GET", "/hotels/{hotel_id}/full"):
+        response = client.get("/hotels/1/full")
+    assert response.status_code == 200
+    assert response.json()["rooms"]
+
+
+def test_hotel_calendar(client, query_budget):
+    with query_budget("GET", "/hotels/{hotel_id}/calendar"):
+        response = client.get("/hotels/1/calendar", params={"from": date.today(), "to": date.today() + timedelta(days=30)})
+    assert response.status_code == 200
+
+
+def test_create_hotel(client, query_budget):
+    with query_budget("POST", "/hotels/"):
+        response = client.post("/hotels/", json=HOTEL)
+    assert response.status_code == 201
+
+
+def test_edit_hotel(client, query_budget):
+    hotel_id = create_hotel(client)
+    with query_budget("PUT", "/hotels/{hotel_id}"):
+        response = client.put(f"/hotels/{hotel_id}", json=HOTEL | {"stars": 4})
+    assert response.status_code == 200
+
+
+def test_update_hotel(client, query_budget):
+    hotel_id = create_hotel(client)
+    with query_budget("PATCH", "/hotels/{hotel_id}"):
+        response = client.patch(f"/hotels/{hotel_id}", json={"stars": 5})
+    assert response.status_code == 200
+
+
+def test_delete_hotel(client, query_budget):
+    hotel_id = create_hotel(client)
+    with query_budget("DELETE", "/hotels/{hotel_id}"):
+        response = client.delete(f"/hotels/{hotel_id}")
+    assert response.status_code == 204
+
+
+def test_available_rooms(client, query_budget):
+    with query_budget("GET", "/rooms/available"):
+        response = client.get("/rooms/available", params={"check_in": FREE_DATE, "check_out": FREE_DATE + timedelta(days=2)})
+    assert response.status_code == 200
+    assert response.json()
+
+
+def test_batch_loads_not_counted(client):
+    # One selectinload batch per room, as one per 500 rooms on real data
+    async def load_rooms():
+        async with DBManager() as db:
+            query = select(RoomsORM).options(selectinload(RoomsORM.facilities, chunksize=1))
+            return (await db.session.execute(query)).scalars().all()
+
+    with check_query_budget(1) as statements:
+        rooms = client.portal.call(load_rooms)
+    assert len(rooms) > 1
+    assert len(statements) == 1
+
+
+def test_room(client, query_budget):
+    with query_budget("GET", "/hotels/{hotel_id}/rooms/{room_id}"):
+        response = client.get("/hotels/1/rooms/1", headers=NOT_MATCHING_ETAG)
+    assert response.status_code == 200
+
+
+def facility_ids(room: dict) -> list[int]:
+    return sorted(facility["id"] for facility in room["facilities"])
+
+
+def test_create_room(client, query_budget):
+    with query_budget("POST", "/hotels/{hotel_id}/rooms"):
+        response = client.post("/hotels/1/rooms", json=ROOM)
+    assert response.status_code == 200
+    assert facility_ids(response.json()["data"]) == [1, 2]
+
+
+def test_edit_room(client, query_budget):
+    room_id = create_room(client, 1, [1, 2])
+    with query_budget("PUT", "/hotels/{hotel_id}/rooms/{room_id}"):
+        response = client.put(f"/hotels/1/rooms/{room_id}", json=ROOM | {"facilities": [2, 3]})
+    assert response.status_code == 200
+    assert facility_ids(response.json()["data"]) == [2, 3]
+
+
+def test_update_room(client, query_budget):
+    room_id = create_room(client, 1, [1])
+    with query_budget("PATCH", "/hotels/{hotel_id}/rooms/{room_id}"):
+        response = client.patch(f"/hotels/1/rooms/{room_id}", json={"price": 120, "facilities": [1, 3]})
+    assert response.status_code == 200
+    assert facility_ids(response.json()["data"]) == [1, 3]
+
+
+def test_update_room_facilities_only(client, query_budget):
+    room_id = create_room(client, 1, [1])
+    version = client.get(f"/hotels/1/rooms/{room_id}").json()["version"]
+    with query_budget("PATCH", "/hotels/{hotel_id}/rooms/{room_id}"):
+        response = client.patch(f"/hotels/1/rooms/{room_id}", json={"facilities": [2]})
+    assert response.status_code == 200
+    assert facility_ids(response.json()["data"]) == [2]
+    assert response.json()["data"]["version"] > version
+
+
+def test_delete_room(client, query_budget):
+    room_id = create_room(client, 1, [])
+    with query_budget("DELETE", "/hotels/{hotel_id}/rooms/{room_id}"):
+        response = client.delete(f"/hotels/1/rooms/{room_id}")
+    assert response.status_code == 200
+
+
+def test_my_bookings(client, query_budget):
+    with query_budget("GET", "/bookings/me"):
+        response = client.get("/bookings/me")
+    assert response.status_code == 200
+
+
+def test_all_bookings(client, query_budget):
+    with query_budget("GET", "/bookings/"):
+        response = client.get("/bookings/")
+    assert response.status_code == 200
+    assert response.json()
+
+
+def test_create_booking(client, query_budget):
+    with query_budget("POST", "/bookings/"):
+        response = client.post("/bookings/", json={
+            "room_id": 2, "check_in": str(FREE_DATE), "check_out": str(FREE_DATE + timedelta(days=3))
+        })
+    assert response.status_code == 201
+
+
+def test_create_bookings_batch(client, query_budget):
+    items = [
+        {"room_id": room_id, "check_in": str(FREE_DATE), "check_out": str(FREE_DATE + timedelta(days=2))}
+        for room_id in (3, 4)
+    ]
+    with query_budget("POST", "/bookings/batch"):
+        response = client.post("/bookings/batch", json={"items": items})
+    assert response.status_code == 201
+    assert len(response.json()["created"]) == 2
+
+
+def test_facilities(client, query_budget):
+    with query_budget("GET", "/facilities/"):
+        response = client.get("/facilities/", headers=NOT_MATCHING_ETAG)
+    assert response.status_code == 200
+
+
+def test_create_facility(client, query_budget):
+    with query_budget("POST", "/facilities/"):
+        response = client.post("/facilities/", json={"title": f"Facility {uuid4().hex[:8]}", "description": None})
+    assert response.status_code == 201
+
+
+@pytest.mark.parametrize("kind, body", [
+    ("hotels", "title,location,stars,check_in,check_out\nImported Hotel,Porto,4,14:00,12:00\n"),
+    ("rooms", "hotel_id,room_type_id,number,title,description,price\n1,1,801,Imported Room,,90\n"),
+    ("room_facilities", "room_id,facility_id\n1,5\n"),
+])
+def test_import(client, query_budget, kind, body):
+    with query_budget("POST", "/imports/{kind}"):
+        response = client.post(f"/imports/{kind}", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    assert response.json()["failed"] == 0
+
+
+def test_metrics(client, query_budget):
+    with query_budget("GET", "/metrics"):
+        response = client.get("/metrics")
+    assert response.status_code == 200